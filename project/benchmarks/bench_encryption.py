@@ -0,0 +1,63 @@
+"""
+Encryption throughput benchmark
+Compares per-item encrypt_data/decrypt_data with the bulk and envelope APIs
+
+Usage: python benchmarks/bench_encryption.py [--items N] [--size BYTES] [--large BYTES]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.security import SecurityManager
+
+
+def measure(label, func, count, size):
+    """Run func once and print ops/s and MB/s"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<42} {count / elapsed:>12,.0f} ops/s {count * size / elapsed / 1e6:>10.1f} MB/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=20000, help="messages per batch")
+    parser.add_argument("--size", type=int, default=200, help="bytes per message")
+    parser.add_argument("--large", type=int, default=4 * 1024 * 1024, help="bytes per large payload")
+    parser.add_argument("--large-items", type=int, default=16, help="number of large payloads")
+    args = parser.parse_args()
+
+    security = SecurityManager()
+    print(f"{security.max_crypto_workers} crypto workers, "
+          f"parallel from {security.parallel_threshold} items\n")
+
+    messages = ["x" * args.size] * args.items
+    print(f"{args.items} messages of {args.size} bytes")
+    tokens = measure("encrypt_data loop", lambda: [security.encrypt_data(m) for m in messages],
+                     args.items, args.size)
+    measure("decrypt_data loop", lambda: [security.decrypt_data(t) for t in tokens],
+            args.items, args.size)
+    tokens = measure("encrypt_many", lambda: security.encrypt_many(messages), args.items, args.size)
+    measure("decrypt_many", lambda: security.decrypt_many(tokens), args.items, args.size)
+    tokens = measure("encrypt_many (envelope)", lambda: security.encrypt_many(messages, envelope=True),
+                     args.items, args.size)
+    measure("decrypt_many (envelope)", lambda: security.decrypt_many(tokens), args.items, args.size)
+
+    payloads = ["y" * args.large] * args.large_items
+    print(f"\n{args.large_items} payloads of {args.large} bytes")
+    tokens = measure("encrypt_data (Fernet)", lambda: [security.encrypt_data(p, envelope=False) for p in payloads],
+                     args.large_items, args.large)
+    measure("decrypt_data (Fernet)", lambda: [security.decrypt_data(t) for t in tokens],
+            args.large_items, args.large)
+    tokens = measure("encrypt_data (envelope)", lambda: [security.encrypt_data(p) for p in payloads],
+                     args.large_items, args.large)
+    measure("decrypt_data (envelope)", lambda: [security.decrypt_data(t) for t in tokens],
+            args.large_items, args.large)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Personality rewriter benchmark
+Compares the compiled phrase rewriter with the original replace-per-phrase loop,
+on the default English table and on a large synthetic one
+
+Usage: python benchmarks/bench_personality.py [--responses N] [--phrases N] [--verify N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.languages import LanguageManager
+from src.utils.rewriter import PhraseRewriter
+
+
+def legacy_apply(text):
+    """The implementation _apply_personality_to_text replaced"""
+    executive_phrases = {
+        "suggest": "recommend",
+        "think": "analyze",
+        "look at": "evaluate",
+        "try": "implement",
+        "problem": "challenge",
+        "idea": "strategy"
+    }
+    for original, replacement in executive_phrases.items():
+        text = text.replace(original, replacement)
+    if "recommend" in text.lower():
+        text += "\n\nThis recommendation is based on current market analysis and trending data."
+    if "strategy" in text.lower():
+        text += "\n\nThis aligns with long-term objectives and market positioning."
+    return text
+
+
+WORDS = ("I", "think", "we", "should", "try", "a", "new", "idea", "to", "look at", "the", "problem",
+         "and", "suggest", "Strategy", "RECOMMEND", "team", "budget", "quarter", "market", "it")
+
+
+def response(rng, words=40):
+    """A made-up spoken response"""
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def timed(func, items):
+    """Return seconds taken to apply func to every item"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--responses", type=int, default=50000, help="responses to rewrite")
+    parser.add_argument("--phrases", type=int, default=200, help="size of the synthetic phrase table")
+    parser.add_argument("--verify", type=int, default=0, help="random responses to compare with the original")
+    args = parser.parse_args()
+
+    rewriter = LanguageManager().get_rewriter("en")
+    rng = random.Random(0)
+    if args.verify:
+        mismatches = 0
+        for _ in range(args.verify):
+            text = response(rng, rng.randint(0, 60))
+            mismatches += legacy_apply(text) != rewriter.apply(text)
+        print(f"verified {args.verify} responses, mismatches: {mismatches}")
+        if mismatches:
+            sys.exit(1)
+
+    responses = [response(rng) for _ in range(args.responses)]
+    legacy_time = timed(legacy_apply, responses)
+    new_time = timed(rewriter.apply, responses)
+    print(f"default table  {args.responses} responses  legacy {legacy_time * 1000:8.1f} ms  "
+          f"compiled {new_time * 1000:8.1f} ms  ({legacy_time / new_time:.1f}x)")
+
+    table = {}
+    while len(table) < args.phrases:
+        phrase = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 9)))
+        table[phrase] = phrase.upper()
+    large = PhraseRewriter(table)
+
+    def replace_each(text):
+        for original, replacement in table.items():
+            text = text.replace(original, replacement)
+        return text
+
+    legacy_time = timed(replace_each, responses)
+    new_time = timed(large.rewrite, responses)
+    print(f"{args.phrases} phrases    {args.responses} responses  legacy {legacy_time * 1000:8.1f} ms  "
+          f"compiled {new_time * 1000:8.1f} ms  ({legacy_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
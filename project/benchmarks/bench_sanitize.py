@@ -0,0 +1,82 @@
+"""
+Input sanitizer benchmark
+Compares sanitize_input with the original per-character implementation
+
+Usage: python benchmarks/bench_sanitize.py [--size BYTES] [--verify]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.security import SecurityManager, SANITIZE_PROFILES
+
+
+def legacy_sanitize(input_str):
+    """The generator-based sanitizer sanitize_input replaced"""
+    sanitized = ''.join(char for char in input_str
+                        if char.isalnum() or char in ' .,!?-_@#$%^&*()[]{}')
+    return sanitized.strip()
+
+
+def timed(func, *args):
+    """Return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def verify(security):
+    """Check both sanitizer paths against isalnum() for every code point
+
+    Every profile is checked, plus one that doesn't allow "_".
+    """
+    profiles = dict(SANITIZE_PROFILES, no_underscore=" .,-")
+    security.add_sanitize_profile("no_underscore", profiles["no_underscore"])
+    ok = True
+    for name, allowed in profiles.items():
+        table, pattern = security._sanitizers[name]
+        mismatches = [hex(code) for code in range(0x110000)
+                      if (chr(code).isalnum() or chr(code) in allowed) != (pattern.sub('', chr(code)) == chr(code))
+                      or (code < 128 and (code in table) == (chr(code).isalnum() or chr(code) in allowed))]
+        print(f"{name}: code points checked: 0x110000, mismatches: {len(mismatches)} {mismatches[:10]}")
+        ok = ok and not mismatches
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1024 * 1024, help="characters per input")
+    parser.add_argument("--verify", action="store_true", help="check every Unicode code point")
+    args = parser.parse_args()
+
+    security = SecurityManager()
+    if args.verify and not verify(security):
+        sys.exit(1)
+
+    alphabet = "abcdefghijklmnopqrstuvwxyz ABC 0123456789 .,!?<>/\\\"';:|`~+= \t\n"
+    samples = {
+        "mixed ascii": "".join(random.choice(alphabet) for _ in range(args.size)),
+        "mixed unicode": "".join(random.choice(alphabet + "éßж中😀") for _ in range(args.size)),
+        "plain ascii": ("The quick brown fox jumps over the lazy dog 42. " * (args.size // 48 + 1))[:args.size],
+        "mostly stripped": ("<script>alert('x')</script>;" * (args.size // 29 + 1))[:args.size]
+    }
+    for name, text in samples.items():
+        expected, legacy_time = timed(legacy_sanitize, text)
+        result, new_time = timed(security.sanitize_input, text)
+        assert result == expected, f"output differs for {name}"
+        print(f"{name:<16} legacy {legacy_time * 1000:8.1f} ms  new {new_time * 1000:7.1f} ms  "
+              f"({legacy_time / new_time:.1f}x)")
+
+    messages = [samples["mixed ascii"][i:i + 200] for i in range(0, args.size, 200)]
+    _, legacy_time = timed(lambda: [legacy_sanitize(m) for m in messages])
+    _, batch_time = timed(security.sanitize_many, messages)
+    print(f"{len(messages)} x 200 chars  legacy {legacy_time * 1000:8.1f} ms  batch {batch_time * 1000:7.1f} ms  "
+          f"({legacy_time / batch_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Startup benchmark
+Times a cold start of the CLI through its first command, plus an import-time profile
+
+Exits non-zero if ``import main`` takes longer than --budget or pulls in one of
+the dependencies that should only load on first use.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--top N] [--budget MS]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded through src.utils.lazy; none of these should be imported at startup
+DEFERRED_MODULES = ("pyttsx3", "jwt", "bcrypt", "cryptography", "numpy", "requests",
+                    "openai", "speech_recognition")
+
+
+def child():
+    """Measure one cold start in this (fresh) interpreter"""
+    sys.path.insert(0, PROJECT_DIR)
+    start = time.perf_counter()
+    from src.task_manager import TaskManager
+    from src.ui.cli import CommandLineInterface
+    imported = time.perf_counter()
+    cli = CommandLineInterface(TaskManager())
+    constructed = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli.get_handler("help")([])
+    listed = time.perf_counter()
+    print(f"{imported - start} {constructed - imported} {listed - constructed}")
+
+
+def import_profile(top):
+    """Print the slowest imports of ``import main`` from -X importtime
+
+    Returns (cumulative ms, deferred modules that were imported anyway).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=PROJECT_DIR, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    if result.returncode != 0 or not rows:
+        print(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+        return None, []
+    total = max(rows)[0]
+    print(f"\nimport main: {total / 1000:.1f} ms cumulative; slowest imports:")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+    imported = {name.strip().split(".")[0] for _, _, name in rows}
+    return total / 1000, [name for name in DEFERRED_MODULES if name in imported]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to time")
+    parser.add_argument("--top", type=int, default=20, help="imports to list in the profile")
+    parser.add_argument("--budget", type=float, default=250, help="cold-start budget for import main, in ms")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    samples = []
+    for _ in range(args.runs):
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                                cwd=PROJECT_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr.strip().splitlines()[-1])
+            sys.exit(1)
+        samples.append([float(value) for value in result.stdout.split()[-3:]])
+
+    print(f"cold start over {args.runs} runs (median)")
+    for label, values in zip(("imports", "construct CLI", "first command"), zip(*samples)):
+        print(f"{label:<15} {statistics.median(values) * 1000:8.1f} ms")
+    print(f"{'total':<15} {statistics.median(sum(run) for run in samples) * 1000:8.1f} ms")
+    total, eager = import_profile(args.top)
+    if total is None:
+        sys.exit(1)
+    failed = False
+    if eager:
+        print(f"\nimported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    print(f"budget {args.budget:.0f} ms: {'met' if total <= args.budget else 'missed'}")
+    if total > args.budget:
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
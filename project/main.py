@@ -7,6 +7,10 @@ import sys
 from src.task_manager import TaskManager
 from src.ui.cli import CommandLineInterface
 from src.utils.logger import setup_logger
+from src.utils.automation import AutomationManager
+from src.utils.dispatcher import NotificationDispatcher, DesktopChannel
+from src.utils.notifications import NotificationManager
+from src.utils.reminders import get_reminder_service
 
 def main():
     """Main function to start the application"""
@@ -17,6 +21,23 @@ def main():
     # Initialize the task manager
     task_manager = TaskManager()
     
+    # Deliver notifications in the background
+    dispatcher = NotificationDispatcher([DesktopChannel()])
+    notification_manager = NotificationManager(dispatcher=dispatcher)
+    notification_manager.attach_task_manager(task_manager)
+    notification_manager.start()
+    
+    # Fire task reminders stored in the task file
+    reminder_service = get_reminder_service()
+    reminder_service.attach_task_manager(task_manager)
+    reminder_service.start()
+    
+    # Run workflows triggered by task, calendar and chat events
+    automation = AutomationManager()
+    automation.start()
+    # Workflow actions are registered before this, so interrupted runs can resolve them
+    automation.resume_interrupted_runs()
+    
     # Initialize CLI
     cli = CommandLineInterface(task_manager)
     
@@ -30,6 +51,14 @@ def main():
         logger.error(f"An unexpected error occurred: {e}")
         print(f"\nAn unexpected error occurred: {e}")
         sys.exit(1)
+    finally:
+        # The assistant is built on first use; don't build it just to shut it down
+        if "virtual_assistant" in cli.__dict__:
+            cli.virtual_assistant.shutdown()
+        automation.close()
+        reminder_service.stop()
+        notification_manager.stop()
+        dispatcher.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,6 +5,20 @@ Defines the Task class representing a task in the system
 import uuid
 from datetime import datetime
 
+
+def _serialize_entry(entry):
+    """Convert datetimes in a note or history entry to ISO strings"""
+    return {key: value.isoformat() if isinstance(value, datetime) else value
+            for key, value in entry.items()}
+
+
+def _deserialize_entry(entry):
+    """Restore the timestamp of a note or history entry"""
+    if isinstance(entry.get("timestamp"), str):
+        entry = dict(entry, timestamp=datetime.fromisoformat(entry["timestamp"]))
+    return entry
+
+
 class Task:
     """Task class representing a single task"""
     PRIORITY_LEVELS = ["low", "medium", "high", "critical"]
@@ -69,13 +83,13 @@ class Task:
             "subtasks": [subtask.to_dict() for subtask in self.subtasks],
             "tags": self.tags,
             "dependencies": self.dependencies,
-            "notes": self.notes,
+            "notes": [_serialize_entry(note) for note in self.notes],
             "time_spent": self.time_spent,
             "progress": self.progress,
             "template": self.template,
             "shared_with": self.shared_with,
             "reminder": self.reminder.isoformat() if self.reminder else None,
-            "history": self.history
+            "history": [_serialize_entry(change) for change in self.history]
         }
     
     @classmethod
@@ -105,13 +119,13 @@ class Task:
             subtasks=subtasks,
             tags=data.get("tags", []),
             dependencies=data.get("dependencies", []),
-            notes=data.get("notes", []),
+            notes=[_deserialize_entry(note) for note in data.get("notes", [])],
             time_spent=data.get("time_spent", 0),
             progress=data.get("progress", 0),
             template=data.get("template", False),
             shared_with=data.get("shared_with", []),
             reminder=reminder,
-            history=data.get("history", [])
+            history=[_deserialize_entry(change) for change in data.get("history", [])]
         )
     
     def _record_change(self, field, old_value, new_value):
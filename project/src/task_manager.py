@@ -4,16 +4,25 @@ Handles the core business logic for managing tasks
 """
 import os
 import json
+import threading
 from datetime import datetime
 from src.models.task import Task
 from src.utils.logger import get_logger
+from src.utils.events import get_event_bus
 
 class TaskManager:
-    """Task Manager class for handling task operations"""
+    """Task Manager class for handling task operations
+
+    Tasks are changed from the CLI and from background services (such as
+    the reminder thread), so changes to the list and writes of the data
+    file happen under one lock. Events are published after it is released.
+    """
     def __init__(self, data_file="data/tasks.json"):
         self.logger = get_logger()
         self.data_file = data_file
         self.tasks = []
+        self._lock = threading.RLock()
+        self.event_bus = get_event_bus()
         self.load_tasks()
     
     def load_tasks(self):
@@ -43,10 +52,11 @@ class TaskManager:
             os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
             
             # Save tasks to file
-            task_data = [task.to_dict() for task in self.tasks]
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(task_data, f, indent=2)
-            self.logger.info(f"Saved {len(self.tasks)} tasks to {self.data_file}")
+            with self._lock:
+                task_data = [task.to_dict() for task in self.tasks]
+                with open(self.data_file, 'w', encoding='utf-8') as f:
+                    json.dump(task_data, f, indent=2)
+            self.logger.info(f"Saved {len(task_data)} tasks to {self.data_file}")
         except Exception as e:
             self.logger.error(f"Error saving tasks: {e}")
     
@@ -59,14 +69,17 @@ class TaskManager:
             due_date=due_date,
             category=category
         )
-        self.tasks.append(task)
-        self.save_tasks()
+        with self._lock:
+            self.tasks.append(task)
+            self.save_tasks()
         self.logger.info(f"Added task: {task.id} - {task.title}")
+        self._publish("task.added", task)
         return task
     
     def get_tasks(self, filter_completed=None, filter_category=None, filter_priority=None):
         """Get tasks with optional filtering"""
-        filtered_tasks = self.tasks
+        with self._lock:
+            filtered_tasks = list(self.tasks)
         
         if filter_completed is not None:
             filtered_tasks = [task for task in filtered_tasks if task.completed == filter_completed]
@@ -81,50 +94,60 @@ class TaskManager:
     
     def get_task_by_id(self, task_id):
         """Get a task by its ID"""
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
+        with self._lock:
+            for task in self.tasks:
+                if task.id == task_id:
+                    return task
         return None
     
     def update_task(self, task_id, **kwargs):
         """Update a task with the given ID"""
-        task = self.get_task_by_id(task_id)
+        with self._lock:
+            task = self.get_task_by_id(task_id)
+            if task:
+                for key, value in kwargs.items():
+                    if hasattr(task, key):
+                        old_value = getattr(task, key)
+                        setattr(task, key, value)
+                        task._record_change(key, old_value, value)
+                
+                # Update the modified time
+                task.modified = datetime.now()
+                self.save_tasks()
         if task:
-            for key, value in kwargs.items():
-                if hasattr(task, key):
-                    old_value = getattr(task, key)
-                    setattr(task, key, value)
-                    task._record_change(key, old_value, value)
-            
-            # Update the modified time
-            task.modified = datetime.now()
-            self.save_tasks()
             self.logger.info(f"Updated task: {task_id}")
+            self._publish("task.updated", task, changes=list(kwargs))
             return task
         return None
     
     def complete_task(self, task_id):
         """Mark a task as completed"""
-        task = self.get_task_by_id(task_id)
+        with self._lock:
+            task = self.get_task_by_id(task_id)
+            if task:
+                old_completed = task.completed
+                task.completed = True
+                task.completed_date = datetime.now()
+                task.modified = datetime.now()
+                task._record_change("completed", old_completed, True)
+                task._record_change("completed_date", None, task.completed_date)
+                self.save_tasks()
         if task:
-            old_completed = task.completed
-            task.completed = True
-            task.completed_date = datetime.now()
-            task.modified = datetime.now()
-            task._record_change("completed", old_completed, True)
-            task._record_change("completed_date", None, task.completed_date)
-            self.save_tasks()
             self.logger.info(f"Completed task: {task_id}")
+            self._publish("task.completed", task)
             return task
         return None
     
     def delete_task(self, task_id):
         """Delete a task by its ID"""
-        task = self.get_task_by_id(task_id)
+        with self._lock:
+            task = self.get_task_by_id(task_id)
+            if task:
+                self.tasks.remove(task)
+                self.save_tasks()
         if task:
-            self.tasks.remove(task)
-            self.save_tasks()
             self.logger.info(f"Deleted task: {task_id}")
+            self._publish("task.deleted", task)
             return True
         return False
     
@@ -136,7 +159,7 @@ class TaskManager:
         query = query.lower()
         results = []
         
-        for task in self.tasks:
+        for task in self.get_tasks():
             if (query in task.title.lower() or 
                 query in task.description.lower() or 
                 (task.category and query in task.category.lower())):
@@ -148,7 +171,7 @@ class TaskManager:
     def get_categories(self):
         """Get list of all unique categories"""
         categories = set()
-        for task in self.tasks:
+        for task in self.get_tasks():
             if task.category:
                 categories.add(task.category)
         return sorted(list(categories))
@@ -158,4 +181,18 @@ class TaskManager:
         task = self.get_task_by_id(task_id)
         if task:
             return task.get_history(field, start_date, end_date)
-        return []
\ No newline at end of file
+        return []
+    
+    def _publish(self, event_type, task, **extra):
+        """Publish a task event on the event bus"""
+        payload = {
+            "task_id": task.id,
+            "title": task.title,
+            "priority": task.priority,
+            "category": task.category,
+            "completed": task.completed,
+            "due_date": task.due_date,
+            "task": task
+        }
+        payload.update(extra)
+        self.event_bus.publish(event_type, payload)
\ No newline at end of file
@@ -1,43 +1,57 @@
 import sys
 import shlex
 from datetime import datetime, timedelta
+from functools import cached_property
 from src.utils.logger import get_logger
 from src.utils.colors import Colors
 from src.utils.virtual_assistant import VirtualAssistant
-from src.utils.ai_assistant import AIAssistant
+from src.utils.ai_assistant import get_ai_assistant
 from src.utils.reports import ReportManager
 
 class CommandLineInterface:
     def __init__(self, task_manager):
         self.task_manager = task_manager
         self.logger = get_logger()
-        self.virtual_assistant = VirtualAssistant()
-        self.ai_assistant = AIAssistant()
-        self.report_manager = ReportManager()
         self.running = False
+        # Command name -> handler method name, resolved when the command runs
         self.commands = {
-            "help": self.show_help,
-            "add": self.add_task,
-            "list": self.list_tasks,
-            "view": self.view_task,
-            "update": self.update_task,
-            "complete": self.complete_task,
-            "delete": self.delete_task,
-            "search": self.search_tasks,
-            "categories": self.list_categories,
-            "add-subtask": self.add_subtask,
-            "remove-subtask": self.remove_subtask,
-            "complete-subtask": self.complete_subtask,
-            "assistant": self.toggle_assistant,
-            "advice": self.get_ai_advice,
-            "analyze": self.analyze_tasks,
-            "organize": self.get_organization_advice,
-            "report": self.generate_report,
-            "email-report": self.email_report,
-            "exit": self.exit
+            "help": "show_help",
+            "add": "add_task",
+            "list": "list_tasks",
+            "view": "view_task",
+            "update": "update_task",
+            "complete": "complete_task",
+            "delete": "delete_task",
+            "search": "search_tasks",
+            "categories": "list_categories",
+            "add-subtask": "add_subtask",
+            "remove-subtask": "remove_subtask",
+            "complete-subtask": "complete_subtask",
+            "assistant": "toggle_assistant",
+            "advice": "get_ai_advice",
+            "analyze": "analyze_tasks",
+            "organize": "get_organization_advice",
+            "report": "generate_report",
+            "email-report": "email_report",
+            "exit": "exit"
         }
         self.assistant_enabled = True
     
+    @cached_property
+    def virtual_assistant(self):
+        """Virtual assistant, built on first use"""
+        return VirtualAssistant()
+    
+    @cached_property
+    def ai_assistant(self):
+        """Shared AI assistant"""
+        return get_ai_assistant()
+    
+    @cached_property
+    def report_manager(self):
+        """Report manager, built on first use"""
+        return ReportManager()
+    
     def start(self):
         """Start the CLI interface"""
         self.running = True
@@ -55,8 +69,9 @@ class CommandLineInterface:
                 command = parts[0].lower()
                 args = parts[1:]
                 
-                if command in self.commands:
-                    result = self.commands[command](args)
+                handler = self.get_handler(command)
+                if handler:
+                    result = handler(args)
                     if self.assistant_enabled and result:
                         self.virtual_assistant.speak(result)
                 else:
@@ -68,6 +83,11 @@ class CommandLineInterface:
                 self.logger.error(f"Error processing command: {e}")
                 print(f"{Colors.RED}Error: {e}{Colors.RESET}")
     
+    def get_handler(self, command):
+        """Get the bound handler for a command, or None if there isn't one"""
+        name = self.commands.get(command)
+        return getattr(self, name, None) if name else None
+    
     def toggle_assistant(self, args=None):
         """Toggle virtual assistant"""
         self.assistant_enabled = not self.assistant_enabled
@@ -151,4 +151,15 @@ class AIAssistant:
             
         except Exception as e:
             self.logger.error(f"Error generating suggestions: {e}")
-            return "I encountered a small hiccup while preparing suggestions. Let's try again!"
\ No newline at end of file
+            return "I encountered a small hiccup while preparing suggestions. Let's try again!"
+
+
+_ai_assistant = None
+
+
+def get_ai_assistant():
+    """Get the shared AI assistant"""
+    global _ai_assistant
+    if _ai_assistant is None:
+        _ai_assistant = AIAssistant()
+    return _ai_assistant
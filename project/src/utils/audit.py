@@ -0,0 +1,295 @@
+"""
+Audit module
+Structured security audit events with a buffered, rotating JSONL sink
+"""
+import os
+import re
+import json
+import bisect
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from src.utils.logger import get_logger
+
+# Events may reach the writer slightly out of timestamp order; range queries
+# read this many seconds past their end to catch them
+MAX_SKEW = 1.0
+
+
+class AuditLog:
+    """Audit Log writing security events to rotating JSON Lines files
+
+    ``record`` appends to an in-memory ring buffer (a bounded deque, whose
+    append and popleft are atomic, so producers never take a lock). When
+    it is full the oldest unwritten event is dropped. A writer thread
+    drains the buffer in batches every ``flush_interval`` seconds, or as
+    soon as a batch fills, and appends them to ``audit-NNNNNN.jsonl``,
+    rolling to a new file past ``max_file_bytes`` and keeping the newest
+    ``max_files``.
+
+    Next to each file, ``.idx`` holds a sparse time index: every
+    ``index_every`` events, the highest timestamp written so far and the
+    byte offset of the next event. A time-range query skips whole files
+    using their first watermark and the next file's (the newest event
+    before it), and seeks inside a file to the last entry older than the
+    range start.
+    """
+    def __init__(self, log_dir="logs/audit", max_file_bytes=10 * 1024 * 1024, max_files=10,
+                 buffer_size=10000, batch_size=256, flush_interval=1.0, index_every=256):
+        self.logger = get_logger()
+        self.log_dir = log_dir
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.index_every = index_every
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0}
+        self._buffer = deque(maxlen=buffer_size)
+        self._wakeup = threading.Event()
+        self._flushed = threading.Condition()
+        self._pending_flush = False
+        self._thread = None
+        self._running = False
+        self._file = None
+        self._index_file = None
+        self._seq = None
+        self._watermark = 0.0
+        self._since_index = 0
+        os.makedirs(log_dir, exist_ok=True)
+
+    def record(self, event_type, ip=None, user=None, **details):
+        """Queue an audit event"""
+        event = {
+            "ts": time.time(),
+            "type": event_type,
+            "ip": ip,
+            "user": user,
+            "details": details
+        }
+        if len(self._buffer) == self._buffer.maxlen:
+            self.stats["dropped"] += 1
+        self._buffer.append(event)
+        self.stats["recorded"] += 1
+        if not self._running:
+            self.start()
+        elif len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return event
+
+    def start(self):
+        """Start the writer thread"""
+        with self._flushed:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout=5):
+        """Block until everything recorded so far is on disk"""
+        if not self._running:
+            self._write_pending()
+            return True
+        with self._flushed:
+            self._pending_flush = True
+            self._wakeup.set()
+            return self._flushed.wait_for(lambda: not self._pending_flush, timeout)
+
+    def stop(self):
+        """Write what is buffered and stop the writer"""
+        if self._running:
+            self._running = False
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self._write_pending()
+        self._close_files()
+
+    def query(self, start=None, end=None, ip=None, user=None, event_type=None, limit=None):
+        """Yield written events matching the filters, oldest first
+
+        ``start``/``end`` are datetimes or epoch seconds. Call flush first
+        to include events still in the buffer.
+        """
+        start = _epoch(start)
+        end = _epoch(end)
+        found = 0
+        indexes = [(seq, index) for seq, index in
+                   ((seq, self._read_index(seq)) for seq in self._file_seqs()) if index]
+        for position, (seq, index) in enumerate(indexes):
+            if end is not None and index[0][0] > end + MAX_SKEW:
+                break
+            # A file's newest event is the watermark the next file starts with
+            if start is not None and position + 1 < len(indexes) and indexes[position + 1][1][0][0] < start:
+                continue
+            offset = 0
+            if start is not None:
+                entry = bisect.bisect_left([watermark for watermark, _ in index], start) - 1
+                if entry >= 0:
+                    offset = index[entry][1]
+            with open(self._path(seq, "jsonl"), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # partially written line
+                    ts = event["ts"]
+                    if end is not None and ts > end + MAX_SKEW:
+                        break
+                    if start is not None and ts < start:
+                        continue
+                    if end is not None and ts > end:
+                        continue
+                    if ip is not None and event.get("ip") != ip:
+                        continue
+                    if user is not None and event.get("user") != user:
+                        continue
+                    if event_type is not None and event.get("type") != event_type:
+                        continue
+                    yield event
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+    def by_ip(self, ip, start=None, end=None, limit=None):
+        """Events from one IP address"""
+        return list(self.query(start, end, ip=ip, limit=limit))
+
+    def by_user(self, user, start=None, end=None, limit=None):
+        """Events for one user"""
+        return list(self.query(start, end, user=user, limit=limit))
+
+    def recent(self, seconds=3600, limit=None):
+        """Events from the last ``seconds`` seconds"""
+        return list(self.query(start=time.time() - seconds, limit=limit))
+
+    def _run(self):
+        """Writer loop: drain the buffer in batches"""
+        while self._running:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self._write_pending()
+            with self._flushed:
+                self._pending_flush = False
+                self._flushed.notify_all()
+
+    def _write_pending(self):
+        """Write everything currently buffered"""
+        while self._buffer:
+            batch = []
+            while self._buffer and len(batch) < self.batch_size:
+                batch.append(self._buffer.popleft())
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Error writing audit events: {e}")
+
+    def _write_batch(self, batch):
+        """Append a batch to the current file, indexing and rotating"""
+        if self._file is None:
+            self._open_current()
+        lines = []
+        index_entries = []
+        offset = self._file.tell()
+        for event in batch:
+            if self._since_index >= self.index_every or offset == 0:
+                index_entries.append(f"[{self._watermark!r}, {offset}]\n")
+                self._since_index = 0
+            line = (json.dumps(event, default=str) + "\n").encode()
+            lines.append(line)
+            offset += len(line)
+            self._watermark = max(self._watermark, event["ts"])
+            self._since_index += 1
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        if index_entries:
+            self._index_file.write("".join(index_entries))
+            self._index_file.flush()
+        self.stats["written"] += len(batch)
+        if offset >= self.max_file_bytes:
+            self._rotate()
+
+    def _open_current(self):
+        """Open the newest file for appending, or the first one"""
+        seqs = self._file_seqs()
+        self._seq = seqs[-1] if seqs else 1
+        index = self._read_index(self._seq)
+        self._watermark = index[-1][0] if index else 0.0
+        if index:
+            # Events after the last index entry may be newer than its watermark
+            with open(self._path(self._seq, "jsonl"), "rb") as f:
+                f.seek(index[-1][1])
+                for line in f:
+                    try:
+                        self._watermark = max(self._watermark, json.loads(line)["ts"])
+                    except ValueError:
+                        pass
+        # Index the first event written after a restart
+        self._since_index = self.index_every
+        self._file = open(self._path(self._seq, "jsonl"), "ab")
+        self._index_file = open(self._path(self._seq, "idx"), "a", encoding="utf-8")
+
+    def _rotate(self):
+        """Start a new file and drop the oldest ones past max_files"""
+        self._close_files()
+        self._seq += 1
+        self._file = open(self._path(self._seq, "jsonl"), "ab")
+        self._index_file = open(self._path(self._seq, "idx"), "a", encoding="utf-8")
+        self._since_index = self.index_every
+        for seq in self._file_seqs()[:-self.max_files]:
+            for ext in ("jsonl", "idx"):
+                try:
+                    os.remove(self._path(seq, ext))
+                except FileNotFoundError:
+                    pass
+
+    def _close_files(self):
+        """Close the current file and its index"""
+        for f in (self._file, self._index_file):
+            if f is not None:
+                f.close()
+        self._file = None
+        self._index_file = None
+
+    def _file_seqs(self):
+        """Sequence numbers of the audit files, oldest first"""
+        seqs = []
+        for name in os.listdir(self.log_dir):
+            match = re.fullmatch(r"audit-(\d{6})\.jsonl", name)
+            if match:
+                seqs.append(int(match.group(1)))
+        return sorted(seqs)
+
+    def _read_index(self, seq):
+        """Read a file's sparse index as [(watermark, offset)]"""
+        try:
+            with open(self._path(seq, "idx"), "r", encoding="utf-8") as f:
+                return [tuple(json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _path(self, seq, ext):
+        """Path of an audit file or index"""
+        return os.path.join(self.log_dir, f"audit-{seq:06d}.{ext}")
+
+
+def _epoch(value):
+    """Normalise a datetime or epoch seconds to epoch seconds"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+_audit_log = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Get the shared audit log (directory from AUDIT_LOG_DIR)"""
+    global _audit_log
+    with _audit_log_lock:
+        if _audit_log is None:
+            _audit_log = AuditLog(os.getenv("AUDIT_LOG_DIR", "logs/audit"))
+        return _audit_log
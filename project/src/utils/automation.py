@@ -1,19 +1,56 @@
 """
 Automation module for task automation and workflow management
 """
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from src.utils.logger import get_logger
+from src.utils.workflow_executor import WorkflowExecutor
+from src.utils.workflow_store import WorkflowStore, resolve_action_ref
+from src.utils.events import get_event_bus, TriggerIndex, WILDCARD
 
 class AutomationManager:
-    """Automation Manager for handling automated tasks and workflows"""
-    def __init__(self):
+    """Automation Manager for handling automated tasks and workflows
+
+    Triggers only fire between ``start`` and ``close``, which subscribe to
+    and unsubscribe from the event bus. Runs interrupted by a crash are not
+    resumed automatically: register the actions their workflows use, then
+    call ``resume_interrupted_runs``.
+    """
+    def __init__(self, data_dir="data/automation", history_limit=100):
         self.logger = get_logger()
+        self.store = WorkflowStore(data_dir)
+        self.actions = {}
         self.workflows = {}
-        self.scheduled_tasks = {}
-        self.task_history = []
+        self.scheduled_tasks = self.store.load_scheduled_tasks()
+        self.task_history = deque(maxlen=history_limit)
+        self.workflow_stats = self.store.load_stats()
+        self.executor = WorkflowExecutor(action_resolver=self._resolve_callable)
+        self.trigger_index = TriggerIndex()
+        self._triggered_runs = set()
+        self._trigger_lock = threading.Lock()
+        self._trigger_pool = None
+        self._subscribed = False
+        self.event_bus = get_event_bus()
+        
+        for name, workflow in self.store.load_workflows().items():
+            try:
+                self._index_workflow(workflow)
+            except Exception as e:
+                self.logger.error(f"Error loading workflow {name}: {e}")
+    
+    def register_action(self, name, func):
+        """Register a step action that workflows can reference by name"""
+        self.actions[name] = func
         
     def create_workflow(self, name, steps, triggers=None):
-        """Create a new automated workflow"""
+        """Create a new automated workflow
+
+        Triggers are event type strings or dicts with an ``event`` type and
+        optional ``conditions`` and ``predicate`` matched against the payload.
+        """
         try:
             workflow = {
                 "name": name,
@@ -23,7 +60,8 @@ class AutomationManager:
                 "status": "active"
             }
             
-            self.workflows[name] = workflow
+            self._index_workflow(workflow)
+            self.store.save_workflows(self.workflows)
             return workflow
         except Exception as e:
             self.logger.error(f"Error creating workflow: {e}")
@@ -41,38 +79,96 @@ class AutomationManager:
                 "status": "scheduled"
             }
             
+            # Save first, so a task that can't be stored isn't kept either
+            self.store.save_scheduled_tasks(dict(self.scheduled_tasks, **{task_id: scheduled_task}))
             self.scheduled_tasks[task_id] = scheduled_task
             return task_id
         except Exception as e:
             self.logger.error(f"Error scheduling task: {e}")
             return None
     
-    def execute_workflow(self, workflow_name, params=None):
-        """Execute a workflow"""
+    def execute_workflow(self, workflow_name, params=None, run=None):
+        """Execute a workflow, running independent steps concurrently
+
+        Each finished step is checkpointed, so a run interrupted by a crash
+        resumes from its last completed step on the next startup.
+        """
         try:
             workflow = self.workflows.get(workflow_name)
             if not workflow:
                 return False
             
-            results = []
-            for step in workflow["steps"]:
-                result = self._execute_step(step, params)
-                results.append(result)
-                
-                if not result["success"]:
-                    break
+            if run is None:
+                run = self.store.start_run(uuid.uuid4().hex, workflow_name, params)
+            started_at = datetime.now()
+            try:
+                records = self.executor.run(
+                    workflow["steps"],
+                    params,
+                    completed=run["completed"],
+                    on_step_complete=lambda name, record: self.store.checkpoint(run, name, record)
+                )
+            finally:
+                # A run that fails outright must not be resumed on every startup
+                self.store.finish_run(run["run_id"])
+            results = sorted(records.values(), key=lambda r: r.get("started_at") or started_at)
+            success = (len(records) == len(workflow["steps"]) and
+                       all(r["success"] for r in records.values()))
             
-            self.task_history.append({
+            history_entry = {
                 "workflow": workflow_name,
+                "run_id": run["run_id"],
                 "results": results,
-                "timestamp": datetime.now()
-            })
+                "step_timings": {r["step"]: r["duration"] for r in results if not r.get("skipped")},
+                "duration": (datetime.now() - started_at).total_seconds(),
+                "success": success,
+                "timestamp": started_at
+            }
+            self.task_history.append(history_entry)
+            self._update_stats(history_entry)
             
-            return all(r["success"] for r in results)
+            return success
         except Exception as e:
             self.logger.error(f"Error executing workflow: {e}")
             return False
     
+    def resume_interrupted_runs(self):
+        """Resume runs that were checkpointed but never finished"""
+        resumed = 0
+        for run in self.store.pending_runs():
+            if run["workflow"] not in self.workflows:
+                self.logger.warning(f"Dropping run {run['run_id']} of unknown workflow {run['workflow']}")
+                self.store.finish_run(run["run_id"])
+                continue
+            self.logger.info(f"Resuming workflow {run['workflow']} after {len(run['completed'])} completed steps")
+            self.execute_workflow(run["workflow"], run["params"], run=run)
+            resumed += 1
+        return resumed
+    
+    def start(self):
+        """Start running workflows whose triggers match published events"""
+        with self._trigger_lock:
+            if self._subscribed:
+                return
+            self._subscribed = True
+        self.event_bus.subscribe(WILDCARD, self._handle_event)
+    
+    def close(self):
+        """Stop listening for events and wait for triggered runs to finish"""
+        with self._trigger_lock:
+            subscribed, self._subscribed = self._subscribed, False
+        if subscribed:
+            self.event_bus.unsubscribe(WILDCARD, self._handle_event)
+        with self._trigger_lock:
+            pool, self._trigger_pool = self._trigger_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        self.executor.shutdown()
+    
+    def get_workflow_stats(self, workflow_name):
+        """Get rolled-up run statistics for a workflow"""
+        return self.workflow_stats.get(workflow_name)
+    
     def check_scheduled_tasks(self):
         """Check and execute scheduled tasks"""
         try:
@@ -89,17 +185,101 @@ class AutomationManager:
             # Remove non-repeating tasks that were executed
             for task_id in executed_tasks:
                 del self.scheduled_tasks[task_id]
+            if executed_tasks:
+                self.store.save_scheduled_tasks(self.scheduled_tasks)
                 
             return True
         except Exception as e:
             self.logger.error(f"Error checking scheduled tasks: {e}")
             return False
     
-    def _execute_step(self, step, params):
-        """Execute a workflow step"""
+    def _index_workflow(self, workflow):
+        """Store a workflow and index its triggers"""
+        name = workflow["name"]
+        triggers = []
+        for trigger in workflow["triggers"]:
+            if isinstance(trigger, dict):
+                if "event" not in trigger:
+                    raise ValueError(f"Trigger of workflow '{name}' has no event: {trigger!r}")
+                if trigger.get("predicate") is not None:
+                    trigger = dict(trigger, predicate=self._resolve_callable(trigger["predicate"]))
+            elif not isinstance(trigger, str):
+                raise ValueError(f"Invalid trigger for workflow '{name}': {trigger!r}")
+            triggers.append(trigger)
+        
+        # Only replace the indexed triggers once all the new ones are valid
+        self.trigger_index.remove(name)
+        for trigger in triggers:
+            self.trigger_index.add(name, trigger)
+        self.workflows[name] = workflow
+    
+    def _resolve_callable(self, action):
+        """Resolve a registered action name or "module:qualname" reference"""
+        if callable(action):
+            return action
+        if action in self.actions:
+            return self.actions[action]
+        return resolve_action_ref(action)
+    
+    def _update_stats(self, entry):
+        """Roll a finished run up into bounded per-workflow statistics"""
+        stats = self.workflow_stats.setdefault(entry["workflow"], {
+            "runs": 0,
+            "successes": 0,
+            "failures": 0,
+            "total_duration": 0.0,
+            "avg_duration": 0.0,
+            "step_avg_durations": {},
+            "last_run": None,
+            "last_success": None
+        })
+        stats["runs"] += 1
+        stats["successes" if entry["success"] else "failures"] += 1
+        stats["total_duration"] += entry["duration"]
+        stats["avg_duration"] = stats["total_duration"] / stats["runs"]
+        for step, duration in entry["step_timings"].items():
+            previous = stats["step_avg_durations"].get(step)
+            # Exponential moving average keeps the per-step figure O(1) in size
+            stats["step_avg_durations"][step] = duration if previous is None else 0.8 * previous + 0.2 * duration
+        stats["last_run"] = entry["timestamp"]
+        stats["last_success"] = entry["success"]
+        self.store.save_stats(self.workflow_stats)
+    
+    def _handle_event(self, event):
+        """Queue the active workflows whose triggers match an event
+
+        Runs happen on the trigger pool, so the publisher (e.g. a TaskManager
+        mutation) never waits for a workflow.
+        """
+        for name in self.trigger_index.match(event["type"], event["payload"]):
+            workflow = self.workflows.get(name)
+            if not workflow or workflow["status"] != "active":
+                continue
+            with self._trigger_lock:
+                # Skip workflows already queued or running from a trigger so a
+                # workflow whose steps publish its own trigger event can't recurse
+                if name in self._triggered_runs:
+                    continue
+                if self._trigger_pool is None:
+                    self._trigger_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="automation-trigger")
+                self._triggered_runs.add(name)
+                self._trigger_pool.submit(self._run_triggered, name, event)
+    
+    def _run_triggered(self, name, event):
+        """Execute a workflow for a trigger event"""
+        try:
+            self.execute_workflow(name, params={"event": event})
+        finally:
+            with self._trigger_lock:
+                self._triggered_runs.discard(name)
+    
+    def _execute_step(self, step, params, inputs=None):
+        """Execute a single workflow step inline"""
         try:
-            # Implement step execution logic
-            return {"success": True, "result": None}
+            action = step.get("action") if isinstance(step, dict) else step
+            if action is not None:
+                action = self._resolve_callable(action)
+            return {"success": True, "result": action(params, inputs or {}) if action else None}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -0,0 +1,63 @@
+"""
+Blind index module
+Keyed-HMAC token index for searching encrypted text without decrypting it
+"""
+import hmac
+import hashlib
+
+
+class BlindSearchIndex:
+    """Blind Search Index mapping HMAC'd n-grams to document ids
+
+    Text is lowercased and split into overlapping character n-grams; each
+    n-gram is stored only as a truncated HMAC-SHA256 under a key derived
+    from the encryption key, so the index reveals no plaintext. A query
+    returns the documents containing all of its n-grams, a superset of the
+    real substring matches that the caller confirms after decrypting just
+    those candidates. Queries shorter than ``ngram`` can't use the index.
+    """
+    def __init__(self, key, ngram=3, digest_size=16):
+        self._key = key
+        self.ngram = ngram
+        self.digest_size = digest_size
+        self._postings = {}
+
+    def add(self, doc_id, text):
+        """Index a document's plaintext"""
+        for token in self._tokens(text):
+            self._postings.setdefault(token, set()).add(doc_id)
+
+    def remove(self, doc_id, text):
+        """Remove a document given the plaintext it was indexed with"""
+        for token in self._tokens(text):
+            docs = self._postings.get(token)
+            if docs is not None:
+                docs.discard(doc_id)
+                if not docs:
+                    del self._postings[token]
+
+    def candidates(self, query):
+        """Return candidate doc ids for a substring query, or None if too short"""
+        tokens = self._tokens(query)
+        if not tokens:
+            return None
+        postings = []
+        for token in tokens:
+            docs = self._postings.get(token)
+            if not docs:
+                return set()
+            postings.append(docs)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for docs in postings[1:]:
+            result &= docs
+            if not result:
+                break
+        return result
+
+    def _tokens(self, text):
+        """HMAC every distinct n-gram of the lowercased text"""
+        text = text.lower()
+        grams = {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+        return {hmac.new(self._key, gram.encode(), hashlib.sha256).digest()[:self.digest_size]
+                for gram in grams}
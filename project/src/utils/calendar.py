@@ -4,12 +4,14 @@ Provides calendar management functionality
 """
 from datetime import datetime, timedelta
 from src.utils.logger import get_logger
+from src.utils.events import get_event_bus
 
 class CalendarManager:
     """Calendar Manager for handling scheduling"""
     def __init__(self):
         self.logger = get_logger()
         self.events = []
+        self.event_bus = get_event_bus()
     
     def add_event(self, title, start_time, end_time, attendees=None, location=None, description=None):
         """Add a calendar event"""
@@ -23,6 +25,7 @@ class CalendarManager:
             "created": datetime.now()
         }
         self.events.append(event)
+        self.event_bus.publish("calendar.event_added", dict(event, event=event))
         return event
     
     def get_events(self, start_date=None, end_date=None):
@@ -2,23 +2,48 @@
 Chat module for real-time messaging and conversation management
 """
 from datetime import datetime
+import gzip
 import json
+import threading
+import uuid
 from src.utils.logger import get_logger
-from src.utils.ai_assistant import AIAssistant
-from src.utils.security import SecurityManager
+from src.utils.ai_assistant import get_ai_assistant
+from src.utils.security import get_security_manager
+from src.utils.events import get_event_bus
+from src.utils.blind_index import BlindSearchIndex
+from src.utils.message_log import MessageRecord, MessageLog
+from src.utils.response_pipeline import ResponsePipeline
+from src.utils.presence import PresenceStore, PRESENCE_SCOPE
+
+AI_USER_ID = "ai_assistant"
+
 
 class ChatManager:
-    """Chat Manager for handling real-time conversations"""
-    def __init__(self):
+    """Chat Manager for handling real-time conversations
+
+    AI replies are generated in the background by a ResponsePipeline, so
+    send_message returns as soon as the message is stored. A new message
+    in a conversation supersedes the reply still being generated for it,
+    and the assistant's own messages never trigger a reply.
+    """
+    def __init__(self, responder=None, max_concurrent_responses=4):
         self.logger = get_logger()
-        self.security = SecurityManager()
-        self.ai = AIAssistant()
+        self.security = get_security_manager()
+        self.ai = get_ai_assistant()
+        self.responder = responder or getattr(self.ai, "generate_response", None)
         self.conversations = {}
-        self.active_users = set()
-        self.chat_history = {}
         self.message_queue = []
-        self.typing_status = {}
-        self.read_receipts = {}
+        self.presence = PresenceStore()
+        self.message_index = {}  # message id -> (conversation id, offset)
+        self.event_bus = get_event_bus()
+        self.search_index = BlindSearchIndex(self.security.derive_key("chat-search"))
+        self._lock = threading.Lock()
+        self.responses = ResponsePipeline(
+            self._generate_ai_response,
+            on_complete=self._deliver_ai_response,
+            on_chunk=self._stream_ai_response,
+            max_concurrency=max_concurrent_responses
+        )
         
     def start_conversation(self, user_id, conversation_type="direct"):
         """Start a new conversation"""
@@ -28,14 +53,13 @@ class ChatManager:
                 "id": conversation_id,
                 "type": conversation_type,
                 "participants": [user_id],
-                "messages": [],
+                "messages": MessageLog(),
                 "created_at": datetime.now(),
                 "last_activity": datetime.now(),
                 "status": "active"
             }
             
             self.conversations[conversation_id] = conversation
-            self.chat_history[conversation_id] = []
             return conversation_id
         except Exception as e:
             self.logger.error(f"Error starting conversation: {e}")
@@ -51,56 +75,53 @@ class ChatManager:
             # Validate and sanitize content
             content = self.security.sanitize_input(content)
             
-            message = {
-                "id": f"msg_{len(conversation['messages']) + 1}",
-                "conversation_id": conversation_id,
-                "user_id": user_id,
-                "content": content,
-                "type": message_type,
-                "timestamp": datetime.now(),
-                "status": "sent",
-                "read_by": set(),
-                "reactions": {}
-            }
+            message = MessageRecord(
+                id=f"msg_{uuid.uuid4().hex}",
+                conversation_id=conversation_id,
+                user_id=user_id,
+                content=content,
+                type=message_type,
+                timestamp=datetime.now()
+            )
+            
+            # Index the plaintext as keyed hashes before it is encrypted
+            self.search_index.add(message.id, content)
             
             # Process message content
             processed_message = self._process_message(message)
-            conversation["messages"].append(processed_message)
-            conversation["last_activity"] = datetime.now()
+            with self._lock:
+                offset = conversation["messages"].append(processed_message)
+                self.message_index[message.id] = (conversation_id, offset)
+                conversation["last_activity"] = message.timestamp
             
-            # Update chat history
-            self.chat_history[conversation_id].append(processed_message)
+            self.presence.clear("typing", conversation_id, user_id)
+            self.event_bus.publish("chat.message_sent", {
+                "conversation_id": conversation_id,
+                "message_id": message.id,
+                "user_id": user_id,
+                "message_type": message_type
+            })
             
-            # Generate AI response if needed
+            # Queue an AI response; the sender doesn't wait for it
             if self._should_generate_response(processed_message):
-                ai_response = self._generate_ai_response(processed_message)
-                if ai_response:
-                    self.send_message(conversation_id, "ai_assistant", ai_response)
+                self.responses.submit(conversation_id, processed_message)
             
-            return True, message["id"]
+            return True, message.id
         except Exception as e:
             self.logger.error(f"Error sending message: {e}")
             return False, str(e)
     
     def get_conversation_history(self, conversation_id, limit=None):
-        """Get conversation history"""
+        """Get conversation history, reading only the requested tail"""
         try:
-            history = self.chat_history.get(conversation_id, [])
-            if limit:
-                history = history[-limit:]
-            
-            # Decrypt messages
-            decrypted_history = []
-            for message in history:
-                try:
-                    decrypted_content = self.security.decrypt_data(message["content"])
-                    message_copy = message.copy()
-                    message_copy["content"] = decrypted_content
-                    decrypted_history.append(message_copy)
-                except Exception as e:
-                    self.logger.error(f"Error decrypting message: {e}")
+            conversation = self.conversations.get(conversation_id)
+            if not conversation:
+                return []
             
-            return decrypted_history
+            # Decrypt messages in one batch
+            messages = list(conversation["messages"].tail(limit or None))
+            contents = self.security.decrypt_many(message.content for message in messages)
+            return [message.to_dict(content=content) for message, content in zip(messages, contents)]
         except Exception as e:
             self.logger.error(f"Error getting conversation history: {e}")
             return []
@@ -108,13 +129,12 @@ class ChatManager:
     def mark_as_read(self, message_id, user_id):
         """Mark a message as read"""
         try:
-            for conversation in self.conversations.values():
-                for message in conversation["messages"]:
-                    if message["id"] == message_id:
-                        message["read_by"].add(user_id)
-                        message["status"] = "read"
-                        return True
-            return False
+            message = self._get_message(message_id)
+            if not message:
+                return False
+            message.mark_read(user_id)
+            self.presence.publish("read", message.conversation_id, user_id, message_id=message_id)
+            return True
         except Exception as e:
             self.logger.error(f"Error marking message as read: {e}")
             return False
@@ -122,26 +142,22 @@ class ChatManager:
     def add_reaction(self, message_id, user_id, reaction):
         """Add a reaction to a message"""
         try:
-            for conversation in self.conversations.values():
-                for message in conversation["messages"]:
-                    if message["id"] == message_id:
-                        message["reactions"][user_id] = reaction
-                        return True
-            return False
+            message = self._get_message(message_id)
+            if not message:
+                return False
+            message.add_reaction(user_id, reaction)
+            return True
         except Exception as e:
             self.logger.error(f"Error adding reaction: {e}")
             return False
     
     def set_typing_status(self, conversation_id, user_id, is_typing):
-        """Set user typing status"""
+        """Set user typing status (expires unless refreshed within the TTL)"""
         try:
-            if conversation_id not in self.typing_status:
-                self.typing_status[conversation_id] = {}
-            
-            self.typing_status[conversation_id][user_id] = {
-                "status": is_typing,
-                "timestamp": datetime.now()
-            }
+            if is_typing:
+                self.presence.set("typing", conversation_id, user_id)
+            else:
+                self.presence.clear("typing", conversation_id, user_id)
             return True
         except Exception as e:
             self.logger.error(f"Error setting typing status: {e}")
@@ -150,100 +166,237 @@ class ChatManager:
     def get_typing_status(self, conversation_id):
         """Get typing status for a conversation"""
         try:
-            typing_users = []
-            current_time = datetime.now()
-            
-            if conversation_id in self.typing_status:
-                for user_id, status in self.typing_status[conversation_id].items():
-                    # Check if typing status is recent (within last 5 seconds)
-                    if (status["status"] and 
-                        (current_time - status["timestamp"]).seconds < 5):
-                        typing_users.append(user_id)
-            
-            return typing_users
+            return list(self.presence.get("typing", conversation_id))
         except Exception as e:
             self.logger.error(f"Error getting typing status: {e}")
             return []
     
+    def set_presence(self, user_id, status="online"):
+        """Set or refresh a user's presence (expires unless refreshed within the TTL)"""
+        try:
+            if status == "offline":
+                self.presence.clear("presence", PRESENCE_SCOPE, user_id)
+            else:
+                self.presence.set("presence", PRESENCE_SCOPE, user_id, status)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error setting presence: {e}")
+            return False
+    
+    def get_active_users(self):
+        """Get {user_id: status} for users currently present"""
+        return self.presence.get("presence", PRESENCE_SCOPE)
+    
+    def subscribe(self, callback, conversation_id=None):
+        """Push typing, read-receipt and presence changes to a callback
+        
+        Pass a conversation id to get only that conversation's typing and
+        read receipts, PRESENCE_SCOPE for presence only, or None for all.
+        Returns a token for unsubscribe.
+        """
+        return self.presence.subscribe(callback, conversation_id)
+    
+    def unsubscribe(self, token):
+        """Stop pushing changes to a subscriber"""
+        return self.presence.unsubscribe(token)
+    
     def search_messages(self, query, conversation_id=None):
-        """Search messages in conversations"""
+        """Search messages in conversations
+
+        Candidates come from the blind index, so only messages that contain
+        every n-gram of the query are decrypted and checked.
+        """
         try:
             results = []
             query = query.lower()
             
-            conversations_to_search = ([self.conversations[conversation_id]] 
-                                     if conversation_id 
-                                     else self.conversations.values())
+            candidates = self.search_index.candidates(query)
+            if candidates is None:
+                return self._scan_messages(query, conversation_id)
             
-            for conversation in conversations_to_search:
-                for message in conversation["messages"]:
-                    decrypted_content = self.security.decrypt_data(message["content"])
-                    if query in decrypted_content.lower():
-                        results.append({
-                            "conversation_id": conversation["id"],
-                            "message": message
-                        })
+            order = {cid: i for i, cid in enumerate(self.conversations)}
+            locations = (self.message_index[message_id] for message_id in candidates
+                         if message_id in self.message_index)
+            matches = sorted(
+                (location for location in locations
+                 if conversation_id is None or location[0] == conversation_id),
+                key=lambda location: (order.get(location[0], len(order)), location[1])
+            )
+            messages = [self.conversations[candidate_conversation]["messages"][offset]
+                        for candidate_conversation, offset in matches
+                        if candidate_conversation in self.conversations]
+            contents = self.security.decrypt_many(message.content for message in messages)
+            for message, decrypted_content in zip(messages, contents):
+                if decrypted_content and query in decrypted_content.lower():
+                    results.append({
+                        "conversation_id": message.conversation_id,
+                        "message": message.to_dict()
+                    })
             
             return results
         except Exception as e:
             self.logger.error(f"Error searching messages: {e}")
             return []
     
+    def _scan_messages(self, query, conversation_id=None):
+        """Search by decrypting every message (for queries too short to index)"""
+        results = []
+        conversations_to_search = ([self.conversations[conversation_id]] 
+                                 if conversation_id 
+                                 else self.conversations.values())
+        
+        for conversation in conversations_to_search:
+            log = conversation["messages"]
+            for start in range(0, len(log), log.page_size):
+                messages = list(log.iter_range(start, start + log.page_size))
+                contents = self.security.decrypt_many(message.content for message in messages)
+                for message, decrypted_content in zip(messages, contents):
+                    if decrypted_content is not None and query in decrypted_content.lower():
+                        results.append({
+                            "conversation_id": conversation["id"],
+                            "message": message.to_dict()
+                        })
+        
+        return results
+    
+    def _get_message(self, message_id):
+        """Look up a message by its id"""
+        location = self.message_index.get(message_id)
+        if not location:
+            return None
+        conversation_id, offset = location
+        return self.conversations[conversation_id]["messages"][offset]
+    
     def _process_message(self, message):
         """Process and enhance message content"""
         try:
             # Encrypt message content
-            message["content"] = self.security.encrypt_data(message["content"])
-            
-            # Add metadata
-            message["metadata"] = {
-                "client_timestamp": datetime.now(),
-                "processed": True
-            }
-            
+            message.content = self.security.encrypt_data(message.content)
             return message
         except Exception as e:
             self.logger.error(f"Error processing message: {e}")
             return message
     
+    def cancel_response(self, conversation_id):
+        """Cancel the AI response being generated for a conversation"""
+        return self.responses.cancel(conversation_id)
+    
     def _should_generate_response(self, message):
         """Determine if an AI response should be generated"""
-        # Add logic to determine when AI should respond
-        return True
+        # Never answer the assistant itself, or each reply would trigger another
+        if message.user_id == AI_USER_ID:
+            return False
+        return self.responder is not None and message.type == "text"
     
     def _generate_ai_response(self, message):
-        """Generate an AI response to a message"""
-        try:
-            # Decrypt message for processing
-            decrypted_content = self.security.decrypt_data(message["content"])
-            
-            # Generate response using AI assistant
-            response = self.ai.generate_response(decrypted_content)
-            
-            return response
-        except Exception as e:
-            self.logger.error(f"Error generating AI response: {e}")
+        """Generate an AI response to a message (runs on the pipeline)
+        
+        Returns whatever the responder returns: a string, or chunks to stream.
+        """
+        # Decrypt message for processing
+        decrypted_content = self.security.decrypt_data(message.content)
+        if not decrypted_content:
             return None
+        return self.responder(decrypted_content)
+    
+    def _stream_ai_response(self, conversation_id, message, chunk, index):
+        """Publish a partial AI response as it is generated"""
+        self.event_bus.publish("chat.response_chunk", {
+            "conversation_id": conversation_id,
+            "reply_to": message.id,
+            "chunk": chunk,
+            "index": index
+        })
+    
+    def _deliver_ai_response(self, conversation_id, message, text):
+        """Post a finished AI response to its conversation"""
+        self.send_message(conversation_id, AI_USER_ID, text)
     
     def export_conversation(self, conversation_id, format="json"):
         """Export conversation history in various formats"""
         try:
-            history = self.get_conversation_history(conversation_id)
-            
             if format == "json":
+                history = self.get_conversation_history(conversation_id)
                 return json.dumps(history, default=str, indent=2)
+            elif format == "jsonl":
+                return "".join(self.iter_export(conversation_id, format))
             elif format == "text":
-                return self._format_text_export(history)
+                return "".join(self.iter_export(conversation_id, format)).rstrip("\n")
             else:
                 return None
         except Exception as e:
             self.logger.error(f"Error exporting conversation: {e}")
             return None
     
-    def _format_text_export(self, history):
-        """Format conversation history as text"""
-        text = []
-        for message in history:
-            timestamp = message["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
-            text.append(f"[{timestamp}] {message['user_id']}: {message['content']}")
-        return "\n".join(text)
\ No newline at end of file
+    def reencrypt_messages(self, batch_size=500):
+        """Move every stored message onto the primary key in the background
+        
+        Returns the running ReencryptionJob; call after rotating keys.
+        """
+        def source():
+            for conversation in list(self.conversations.values()):
+                for message in conversation["messages"]:
+                    yield message, message.content
+        
+        def update(message, content):
+            message.content = content
+        
+        return self.security.start_reencryption(source(), update, batch_size)
+    
+    def iter_export(self, conversation_id, format="jsonl"):
+        """Yield a conversation export one line at a time
+        
+        Messages are decrypted a page at a time as they are written, so
+        memory use doesn't grow with the conversation. Messages sent after
+        the export started are not included.
+        """
+        conversation = self.conversations.get(conversation_id)
+        if not conversation:
+            return
+        if format == "jsonl":
+            format_line = self._format_jsonl_line
+        elif format == "text":
+            format_line = self._format_text_line
+        else:
+            raise ValueError(f"Unsupported export format: {format}")
+        
+        log = conversation["messages"]
+        end = len(log)
+        for start in range(0, end, log.page_size):
+            messages = list(log.iter_range(start, min(start + log.page_size, end)))
+            contents = self.security.decrypt_many(message.content for message in messages)
+            for message, content in zip(messages, contents):
+                yield format_line(message, content)
+    
+    def export_conversation_to_file(self, conversation_id, path, format="jsonl", compress=None):
+        """Stream a conversation export to a file
+        
+        Output is gzipped when compress is True, or by default when the
+        path ends in .gz. Returns the number of messages written, or None
+        on error.
+        """
+        if compress is None:
+            compress = str(path).endswith(".gz")
+        try:
+            opener = gzip.open if compress else open
+            count = 0
+            with opener(path, "wt", encoding="utf-8") as f:
+                for line in self.iter_export(conversation_id, format):
+                    f.write(line)
+                    count += 1
+            return count
+        except Exception as e:
+            self.logger.error(f"Error exporting conversation to {path}: {e}")
+            return None
+    
+    def _format_jsonl_line(self, message, content):
+        """Format one message as a JSON Lines record"""
+        record = message.to_dict(content=content)
+        record["timestamp"] = record["timestamp"].isoformat()
+        record["read_by"] = sorted(record["read_by"])
+        return json.dumps(record, default=str) + "\n"
+    
+    def _format_text_line(self, message, content):
+        """Format one message as a line of text"""
+        timestamp = message.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{timestamp}] {message.user_id}: {content}\n"
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Conversation memory module
+Bounded, encrypted assistant conversation history
+"""
+import json
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from src.utils.logger import get_logger
+
+
+class ConversationMemory:
+    """Conversation Memory keeping recent history in memory and older pages on disk
+
+    Entries are encrypted as they arrive (on the security manager's crypto
+    pool) and kept in pages of ``page_size``. Once more than ``max_pages``
+    pages are held, the oldest page is handed to the crypto pool, which
+    decrypts and re-seals it as a single AES-GCM envelope and appends it to
+    a segment file, so memory stays bounded however long the session runs
+    and ``append`` never waits for the crypto. Pages are written in order,
+    and one still being sealed is read from memory meanwhile. The last
+    ``tail_size`` entries are also kept decrypted, so the recent history
+    the assistant usually asks for needs no decryption at all.
+
+    The segment file is an anonymous temporary file (in ``spill_dir``
+    when given) and goes away with the memory.
+    """
+    def __init__(self, security, page_size=50, max_pages=4, tail_size=20, spill_dir=None):
+        self.logger = get_logger()
+        self.security = security
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.spill_dir = spill_dir
+        self._pages = deque()  # [(type, token or Future, timestamp)]
+        self._spilling = deque()  # {"page", "sealed", "done"} handed to the pool, oldest first
+        self._epoch = 0  # bumped by clear() so late spills are discarded
+        self._tail = deque(maxlen=tail_size)  # decrypted entry dicts
+        self._segment = None
+        self._spilled = []  # (offset or None if lost, size, count) per spilled page
+        self._spilled_count = 0
+        self._length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._length
+
+    def append(self, entry_type, text, timestamp=None):
+        """Add an entry, spilling the oldest page to disk when over the cap"""
+        timestamp = timestamp or datetime.now()
+        token = self.security.encrypt_data_async(text)
+        spills = []
+        with self._lock:
+            if not self._pages or len(self._pages[-1]) == self.page_size:
+                self._pages.append([])
+            self._pages[-1].append((entry_type, token, timestamp))
+            self._tail.append({"type": entry_type, "text": text, "timestamp": timestamp})
+            self._length += 1
+            while len(self._pages) > self.max_pages:
+                spill = {"page": self._pages.popleft(), "sealed": None, "done": False}
+                self._spilling.append(spill)
+                spills.append(spill)
+            epoch = self._epoch
+        for spill in spills:
+            self.security.submit_crypto(self._spill, spill, epoch)
+
+    def recent(self, limit=None):
+        """Get the last ``limit`` entries (all when limit is None), oldest first"""
+        with self._lock:
+            count = self._length if not limit else min(limit, self._length)
+            if count <= len(self._tail):
+                return [dict(entry) for entry in list(self._tail)[len(self._tail) - count:]]
+            sealed_pages, pending, tail = self._collect(self._length - count)
+        # Decrypt outside the lock, so spills finishing on the pool aren't held up
+        entries = []
+        for sealed, first, last in sealed_pages:
+            entries.extend(self._open_page(sealed)[first:last])
+        texts = self.security.decrypt_many(_resolve(token) for _, token, _ in pending)
+        entries.extend({"type": entry_type, "text": text, "timestamp": timestamp}
+                       for (entry_type, _, timestamp), text in zip(pending, texts))
+        entries.extend(tail)
+        return entries
+
+    def clear(self):
+        """Forget everything, including the spilled pages"""
+        with self._lock:
+            self._epoch += 1
+            self._pages.clear()
+            self._spilling.clear()
+            self._tail.clear()
+            self._spilled = []
+            self._spilled_count = 0
+            self._length = 0
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def close(self):
+        """Release the segment file"""
+        self.clear()
+
+    def _collect(self, start):
+        """Gather what is needed to read entries from ``start`` on (lock held)
+
+        Returns the sealed spilled pages with the slice of each to keep,
+        the in-memory entries still encrypted, and a copy of the tail.
+        """
+        tail_start = self._length - len(self._tail)
+
+        # Spilled pages (one envelope each), up to where the decrypted tail begins
+        sealed_pages = []
+        position = 0
+        for offset, size, count in self._spilled:
+            if offset is not None and start < position + count and position < tail_start:
+                self._segment.seek(offset)
+                sealed_pages.append((self._segment.read(size), max(start - position, 0), tail_start - position))
+            position += count
+
+        # Then the pages being spilled and the in-memory pages
+        held = [entry for spill in self._spilling for entry in spill["page"]]
+        held += [entry for page in self._pages for entry in page]
+        first = max(start, self._spilled_count) - self._spilled_count
+        pending = held[first:max(tail_start - self._spilled_count, first)]
+        return sealed_pages, pending, [dict(entry) for entry in self._tail]
+
+    def _spill(self, spill, epoch):
+        """Seal a page into one envelope on the crypto pool, then write it
+
+        Tokens are decrypted one at a time: decrypt_many could fan out onto
+        this same pool and wait on it.
+        """
+        page = spill["page"]
+        try:
+            texts = [self.security.decrypt_data(_resolve(token)) for _, token, _ in page]
+            payload = json.dumps([[entry_type, text, timestamp.isoformat()]
+                                  for (entry_type, _, timestamp), text in zip(page, texts)])
+            sealed = self.security.encrypt_data(payload, envelope=True)
+        except Exception as e:
+            self.logger.error(f"Error sealing conversation page: {e}")
+            sealed = None
+        with self._lock:
+            if epoch != self._epoch:
+                return  # Cleared while sealing
+            spill["sealed"] = sealed
+            spill["done"] = True
+            # Pages may finish out of order; write them in order
+            while self._spilling and self._spilling[0]["done"]:
+                self._write_page(self._spilling.popleft())
+
+    def _write_page(self, spill):
+        """Append a sealed page to the segment file (lock held)"""
+        page, sealed = spill["page"], spill["sealed"]
+        if sealed is None:
+            self.logger.error(f"Dropping {len(page)} conversation entries that could not be sealed")
+            self._spilled.append((None, 0, len(page)))
+        else:
+            if self._segment is None:
+                self._segment = tempfile.TemporaryFile(prefix="conversation-", suffix=".seg",
+                                                       dir=self.spill_dir)
+            self._segment.seek(0, 2)
+            offset = self._segment.tell()
+            self._segment.write(sealed + b"\n")
+            self._spilled.append((offset, len(sealed), len(page)))
+        self._spilled_count += len(page)
+
+    def _open_page(self, sealed):
+        """Decrypt one spilled page"""
+        payload = self.security.decrypt_data(sealed)
+        if payload is None:
+            return []
+        return [{"type": entry_type, "text": text, "timestamp": datetime.fromisoformat(timestamp)}
+                for entry_type, text, timestamp in json.loads(payload)]
+
+
+def _resolve(value):
+    """Wait for an entry that is still being encrypted"""
+    return value.result() if isinstance(value, Future) else value
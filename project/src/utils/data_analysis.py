@@ -1,9 +1,11 @@
 """
 Data Analysis module for advanced insights and predictions
 """
-import numpy as np
 from datetime import datetime, timedelta
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 class DataAnalyzer:
     """Data Analyzer for advanced insights and predictions"""
@@ -0,0 +1,305 @@
+"""
+Notification dispatcher module
+Delivers notifications in the background through pluggable channels
+"""
+import abc
+import asyncio
+import json
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from email.mime.text import MIMEText
+from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
+
+
+class RateLimiter:
+    """Token bucket limiting how many sends a channel makes per second"""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a token is available"""
+        if not self.rate:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class NotificationChannel(abc.ABC):
+    """Base class for notification channels
+
+    ``send_batch`` is a plain blocking method; the dispatcher runs it on a
+    worker thread so slow channels never block the event loop.
+    """
+    name = "channel"
+
+    def __init__(self, batch_size=10, batch_window=0.5, rate=None, burst=1, max_retries=3, retry_backoff=1.0):
+        self.logger = get_logger()
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.rate_limiter = RateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    @abc.abstractmethod
+    def send_batch(self, notifications):
+        """Send a batch of notifications"""
+
+    def close(self):
+        """Release channel resources"""
+
+
+class EmailChannel(NotificationChannel):
+    """Email channel sending one digest per batch over pooled SMTP"""
+    name = "email"
+
+    def __init__(self, pool, sender, recipient, **kwargs):
+        kwargs.setdefault("batch_window", 5.0)
+        kwargs.setdefault("rate", 1.0)
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.sender = sender
+        self.recipient = recipient
+
+    def send_batch(self, notifications):
+        """Send the batch as a single digest email"""
+        if len(notifications) == 1:
+            subject = notifications[0]["message"]
+        else:
+            subject = f"{len(notifications)} new notifications"
+        body = "\n".join(f"- [{n.get('priority', 'medium')}] {n['message']}" for n in notifications)
+        msg = MIMEText(body, "plain")
+        msg["From"] = self.sender
+        msg["To"] = self.recipient
+        msg["Subject"] = subject
+        self.pool.send_message(msg)
+
+
+class WebhookChannel(NotificationChannel):
+    """Webhook channel posting each batch as a JSON list"""
+    name = "webhook"
+
+    def __init__(self, url, timeout=10, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.timeout = timeout
+        self._session = None
+
+    def send_batch(self, notifications):
+        """POST the batch to the webhook URL"""
+        if self._session is None:
+            self._session = requests.Session()
+        response = self._session.post(
+            self.url,
+            data=json.dumps({"notifications": notifications}, default=str),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def close(self):
+        """Close the HTTP session"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class DesktopChannel(NotificationChannel):
+    """Desktop channel using notify-send when available, else the log"""
+    name = "desktop"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.notify_send = shutil.which("notify-send")
+
+    def send_batch(self, notifications):
+        """Show each notification on the desktop"""
+        for notification in notifications:
+            if self.notify_send:
+                urgency = "critical" if notification.get("priority") == "high" else "normal"
+                subprocess.run([self.notify_send, "-u", urgency, "Task Manager", notification["message"]],
+                               check=True, timeout=5)
+            else:
+                self.logger.info(f"Notification: {notification['message']}")
+
+
+class TTSChannel(NotificationChannel):
+    """Text-to-speech channel reading a batch aloud in one utterance"""
+    name = "tts"
+
+    def __init__(self, speaker, **kwargs):
+        kwargs.setdefault("max_retries", 0)
+        super().__init__(**kwargs)
+        self.speaker = speaker
+
+    def send_batch(self, notifications):
+        """Speak the batch"""
+        self.speaker.speak(". ".join(n["message"] for n in notifications))
+
+
+class NotificationDispatcher:
+    """Notification Dispatcher running channel workers on an asyncio loop
+
+    Each channel has a bounded queue; when it is full the oldest pending
+    notification is dropped. Workers batch what is queued within the
+    channel's batch window, honour its rate limit and retry failed sends
+    with exponential backoff.
+    """
+    def __init__(self, channels=None, max_queue=1000):
+        self.logger = get_logger()
+        self.max_queue = max_queue
+        self.channels = {}
+        self.stats = {}
+        self.failed = deque(maxlen=100)
+        self._queues = {}
+        self._workers = {}
+        self._loop = None
+        self._thread = None
+        for channel in channels or []:
+            self.add_channel(channel)
+
+    def add_channel(self, channel):
+        """Register a channel (workers start with the dispatcher)"""
+        self.channels[channel.name] = channel
+        self.stats[channel.name] = {"sent": 0, "failed": 0, "dropped": 0, "retries": 0}
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._start_worker, channel)
+
+    def start(self):
+        """Start the dispatcher loop on a background thread"""
+        if self._thread:
+            return
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            for channel in self.channels.values():
+                self._start_worker(channel)
+            ready.set()
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def dispatch(self, notification, channels=None):
+        """Queue a notification for the given channels (default: all)"""
+        if not self._loop:
+            self.start()
+        names = channels or list(self.channels)
+        self._loop.call_soon_threadsafe(self._enqueue, notification, names)
+
+    def flush(self, timeout=None):
+        """Block until every queued notification has been handled"""
+        if not self._loop:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._join_queues(), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def stop(self, timeout=10):
+        """Flush pending notifications, then stop the loop and channels"""
+        if not self._loop:
+            return
+        self.flush(timeout)
+        asyncio.run_coroutine_threadsafe(self._cancel_workers(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+        for channel in self.channels.values():
+            try:
+                channel.close()
+            except Exception as e:
+                self.logger.error(f"Error closing {channel.name} channel: {e}")
+
+    def _start_worker(self, channel):
+        """Create the queue and worker task for a channel"""
+        self._queues[channel.name] = asyncio.Queue(maxsize=self.max_queue)
+        self._workers[channel.name] = self._loop.create_task(self._run_channel(channel))
+
+    def _enqueue(self, notification, names):
+        """Put a notification on channel queues, dropping the oldest if full"""
+        for name in names:
+            queue = self._queues.get(name)
+            if queue is None:
+                self.logger.warning(f"Unknown notification channel: {name}")
+                continue
+            if queue.full():
+                queue.get_nowait()
+                queue.task_done()
+                self.stats[name]["dropped"] += 1
+            queue.put_nowait(notification)
+
+    async def _run_channel(self, channel):
+        """Worker loop: batch, rate limit and send for one channel"""
+        queue = self._queues[channel.name]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + channel.batch_window
+            while len(batch) < channel.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0 and queue.empty():
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), max(remaining, 0)))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await channel.rate_limiter.acquire()
+                await self._send_with_retry(channel, batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _send_with_retry(self, channel, batch):
+        """Send a batch, retrying with exponential backoff"""
+        loop = asyncio.get_running_loop()
+        stats = self.stats[channel.name]
+        for attempt in range(channel.max_retries + 1):
+            try:
+                await loop.run_in_executor(None, channel.send_batch, batch)
+                stats["sent"] += len(batch)
+                return True
+            except Exception as e:
+                if attempt == channel.max_retries:
+                    self.logger.error(f"Giving up on {channel.name} batch after {attempt + 1} attempts: {e}")
+                    stats["failed"] += len(batch)
+                    self.failed.append({"channel": channel.name, "notifications": batch, "error": str(e)})
+                    return False
+                stats["retries"] += 1
+                await asyncio.sleep(channel.retry_backoff * (2 ** attempt))
+
+    async def _join_queues(self):
+        """Wait for all channel queues to drain"""
+        for queue in list(self._queues.values()):
+            await queue.join()
+
+    async def _cancel_workers(self):
+        """Cancel the channel worker tasks"""
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers = {}
+        self._queues = {}
@@ -0,0 +1,145 @@
+"""
+Events module
+Provides an in-process event bus and an indexed trigger matcher
+"""
+import threading
+from datetime import datetime
+from src.utils.logger import get_logger
+
+WILDCARD = "*"
+
+
+class EventBus:
+    """Event Bus for publishing in-process events to subscribers"""
+    def __init__(self):
+        self.logger = get_logger()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type, handler):
+        """Subscribe a handler to an event type ("*" receives every event)"""
+        with self._lock:
+            handlers = list(self._subscribers.get(event_type, []))
+            handlers.append(handler)
+            self._subscribers[event_type] = handlers
+        return handler
+
+    def unsubscribe(self, event_type, handler):
+        """Remove a handler from an event type"""
+        with self._lock:
+            # Compare with == so a bound method matches the one subscribed earlier
+            handlers = [h for h in self._subscribers.get(event_type, []) if h != handler]
+            if handlers:
+                self._subscribers[event_type] = handlers
+            else:
+                self._subscribers.pop(event_type, None)
+
+    def publish(self, event_type, payload=None):
+        """Publish an event to its subscribers and return the event"""
+        event = {
+            "type": event_type,
+            "payload": payload or {},
+            "timestamp": datetime.now()
+        }
+        # Handler lists are replaced, never mutated, so no lock is needed here
+        handlers = self._subscribers.get(event_type, []) + self._subscribers.get(WILDCARD, [])
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                self.logger.error(f"Error handling event {event_type}: {e}")
+        return event
+
+
+class TriggerIndex:
+    """Trigger Index for matching events to workflow triggers
+
+    A trigger is a dict with an ``event`` type, optional ``conditions``
+    (payload field -> required value) and an optional ``predicate`` callable
+    taking the event payload. Triggers are indexed by event type and then by
+    their first condition, so an event is only checked against triggers whose
+    type and leading condition already match.
+    """
+    def __init__(self):
+        self.logger = get_logger()
+        self._by_type = {}
+        self._by_owner = {}
+
+    def add(self, owner, trigger):
+        """Index a trigger for an owner (e.g. a workflow name)"""
+        if isinstance(trigger, str):
+            trigger = {"event": trigger}
+        conditions = list((trigger.get("conditions") or {}).items())
+        entry = {
+            "owner": owner,
+            "conditions": conditions[1:],
+            "predicate": trigger.get("predicate")
+        }
+        buckets = self._by_type.setdefault(trigger["event"], {"any": [], "fields": {}})
+        if conditions:
+            field, value = conditions[0]
+            buckets["fields"].setdefault(field, {}).setdefault(value, []).append(entry)
+            location = (trigger["event"], field, value)
+        else:
+            buckets["any"].append(entry)
+            location = (trigger["event"], None, None)
+        self._by_owner.setdefault(owner, []).append((location, entry))
+
+    def remove(self, owner):
+        """Remove all triggers for an owner"""
+        for (event_type, field, value), entry in self._by_owner.pop(owner, []):
+            buckets = self._by_type.get(event_type)
+            if not buckets:
+                continue
+            if field is None:
+                buckets["any"].remove(entry)
+            else:
+                entries = buckets["fields"][field][value]
+                entries.remove(entry)
+                if not entries:
+                    del buckets["fields"][field][value]
+                    if not buckets["fields"][field]:
+                        del buckets["fields"][field]
+            if not buckets["any"] and not buckets["fields"]:
+                del self._by_type[event_type]
+
+    def match(self, event_type, payload):
+        """Return the owners whose triggers match an event"""
+        buckets = self._by_type.get(event_type)
+        if not buckets:
+            return []
+
+        candidates = list(buckets["any"])
+        for field, values in buckets["fields"].items():
+            value = payload.get(field)
+            try:
+                candidates.extend(values.get(value, []))
+            except TypeError:
+                # Unhashable payload values can't match an indexed condition
+                continue
+
+        owners = []
+        seen = set()
+        for entry in candidates:
+            if entry["owner"] in seen:
+                continue
+            if any(payload.get(field) != value for field, value in entry["conditions"]):
+                continue
+            if entry["predicate"]:
+                try:
+                    if not entry["predicate"](payload):
+                        continue
+                except Exception as e:
+                    self.logger.error(f"Error evaluating trigger for {entry['owner']}: {e}")
+                    continue
+            seen.add(entry["owner"])
+            owners.append(entry["owner"])
+        return owners
+
+
+_event_bus = EventBus()
+
+
+def get_event_bus():
+    """Get the shared application event bus"""
+    return _event_bus
@@ -3,8 +3,10 @@ Image Generator module
 Provides AI image generation functionality for the application
 """
 import os
-import openai
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+openai = lazy_import("openai")
 
 class ImageGenerator:
     """Image Generator class for creating task-related images"""
@@ -1,9 +1,12 @@
 """
 Integration module for external service connections
 """
-import requests
 from datetime import datetime
 from src.utils.logger import get_logger
+from src.utils.events import get_event_bus
+from src.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
 
 class IntegrationManager:
     """Integration Manager for handling external service connections"""
@@ -12,6 +15,7 @@ class IntegrationManager:
         self.connections = {}
         self.api_tokens = {}
         self.webhooks = {}
+        self.event_bus = get_event_bus()
         
     def add_connection(self, service_name, config):
         """Add a new service connection"""
@@ -71,6 +75,13 @@ class IntegrationManager:
             if not webhook:
                 return False
             
+            self.event_bus.publish("integration.webhook_received", {
+                "webhook_id": webhook_id,
+                "service": webhook["service"],
+                "event_type": webhook["event_type"],
+                "data": event_data
+            })
+            
             # Process webhook event
             response = requests.post(webhook["callback_url"], json=event_data)
             return response.ok
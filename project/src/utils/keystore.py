@@ -0,0 +1,278 @@
+"""
+Keystore module
+Stable, rotatable encryption keys shared by every SecurityManager
+"""
+import os
+import json
+import hmac
+import hashlib
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotations aren't serialised across processes
+    fcntl = None
+
+fernet = lazy_import("cryptography.fernet")
+
+KEY_ID_SEPARATOR = b":"
+
+# Tokens with an unknown key id reload the keyring at most this often (seconds)
+UNKNOWN_KEY_RELOAD_INTERVAL = 5
+
+
+class KeyStore:
+    """Key Store holding the Fernet keyring, JWT secret and derivation secret
+
+    Keys are kept in a local JSON file (mode 0600) that every process
+    reads, so data encrypted by one SecurityManager can be decrypted by
+    any other and tokens survive restarts. Ciphertexts are prefixed with
+    the id of the key that made them (``<key id>:<fernet token>``), so
+    decryption goes straight to the right key; untagged tokens from before
+    key ids fall back to trying every key through MultiFernet.
+
+    ``rotate`` adds a new primary key. Old keys stay until ``retire`` is
+    called, normally after a ReencryptionJob has moved the data over.
+    A token with a key id this process doesn't know reloads the file in
+    case another process rotated, but at most once every
+    UNKNOWN_KEY_RELOAD_INTERVAL seconds, so bogus ids can't flood the disk.
+    Setting ENCRYPTION_KEY / JWT_SECRET_KEY pins a single key instead; with
+    only ENCRYPTION_KEY set, the JWT secret is derived from it, so every
+    process signs and verifies tokens alike.
+    """
+    def __init__(self, path=None):
+        self.logger = get_logger()
+        self.path = path or os.getenv("KEYSTORE_PATH", "data/security/keys.json")
+        self._lock = threading.RLock()
+        self._keys = {}  # key id -> Fernet
+        self.primary_id = None
+        self.pinned = bool(os.getenv("ENCRYPTION_KEY"))
+        self._loaded_at = None
+        self.reload()
+
+    @property
+    def key_ids(self):
+        """Ids of every key in the ring, primary first"""
+        with self._lock:
+            return [self.primary_id] + [kid for kid in self._keys if kid != self.primary_id]
+
+    def reload(self):
+        """(Re)load the keyring, creating the key file on first use"""
+        with self._lock:
+            if self.pinned:
+                data = {
+                    "primary": "env",
+                    "keys": {"env": {"key": os.environ["ENCRYPTION_KEY"], "created_at": None}},
+                    "jwt_secret": hmac.new(os.environ["ENCRYPTION_KEY"].encode(), b"jwt-secret",
+                                           hashlib.sha256).hexdigest(),
+                    "derive_secret": os.environ["ENCRYPTION_KEY"]
+                }
+            else:
+                data = self._read() or self._create()
+            self._keys = {kid: fernet.Fernet(entry["key"]) for kid, entry in data["keys"].items()}
+            self.primary_id = data["primary"]
+            self.jwt_secret = os.getenv("JWT_SECRET_KEY") or data["jwt_secret"]
+            self.derive_secret = data["derive_secret"].encode()
+            ordered = [self._keys[kid] for kid in self.key_ids]
+            self._multi = fernet.MultiFernet(ordered)
+            self._loaded_at = time.monotonic()
+
+    def encrypt(self, data):
+        """Encrypt bytes with the primary key, tagging the key id"""
+        with self._lock:
+            kid, cipher = self.primary_id, self._keys[self.primary_id]
+        return kid.encode() + KEY_ID_SEPARATOR + cipher.encrypt(data)
+
+    def decrypt(self, token):
+        """Decrypt a tagged (or legacy untagged) token"""
+        kid, body = self.split(token)
+        if kid is None:
+            return self._multi.decrypt(body)
+        cipher = self._keys.get(kid)
+        if cipher is None:
+            # Another process may have rotated since we loaded the keyring
+            if not self.pinned and time.monotonic() - self._loaded_at >= UNKNOWN_KEY_RELOAD_INTERVAL:
+                self.reload()
+                cipher = self._keys.get(kid)
+            if cipher is None:
+                raise fernet.InvalidToken(f"Unknown key id {kid}")
+        return cipher.decrypt(body)
+
+    def split(self, token):
+        """Split a token into (key id or None, fernet token)"""
+        if isinstance(token, str):
+            token = token.encode()
+        head, sep, body = token.partition(KEY_ID_SEPARATOR)
+        if not sep:
+            return None, token
+        return head.decode(), body
+
+    def needs_reencryption(self, token):
+        """Whether a token was made with a key other than the primary"""
+        return self.split(token)[0] != self.primary_id
+
+    def rotate(self):
+        """Add a new primary key and return its id"""
+        if self.pinned:
+            raise RuntimeError("Keys pinned by ENCRYPTION_KEY can't be rotated")
+        with self._lock, self._file_lock():
+            data = self._read()
+            kid = self._new_key_id(data["keys"])
+            data["keys"][kid] = {"key": fernet.Fernet.generate_key().decode(), "created_at": datetime.now().isoformat()}
+            data["primary"] = kid
+            self._write(data)
+            self.reload()
+        self.logger.info(f"Rotated encryption key, new primary {kid}")
+        return kid
+
+    def retire(self, kid):
+        """Remove a non-primary key once nothing is encrypted with it"""
+        if self.pinned:
+            return False
+        with self._lock, self._file_lock():
+            data = self._read()
+            if kid == data["primary"] or kid not in data["keys"]:
+                return False
+            del data["keys"][kid]
+            self._write(data)
+            self.reload()
+        return True
+
+    def _create(self):
+        """Create the key file, or read the one another process just created"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._file_lock():
+            data = self._read()
+            if data:
+                return data
+            kid = self._new_key_id({})
+            data = {
+                "primary": kid,
+                "keys": {kid: {"key": fernet.Fernet.generate_key().decode(), "created_at": datetime.now().isoformat()}},
+                "jwt_secret": secrets.token_hex(32),
+                "derive_secret": secrets.token_hex(32)
+            }
+            self._write(data)
+            return data
+
+    def _read(self):
+        """Read the key file, or None if it doesn't exist yet"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, data):
+        """Atomically write the key file, readable only by its owner"""
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialise key file changes across processes"""
+        if fcntl is None:
+            yield
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _new_key_id(self, existing):
+        """Pick an unused key id"""
+        while True:
+            kid = secrets.token_hex(4)
+            if kid not in existing:
+                return kid
+
+
+class ReencryptionJob:
+    """Reencryption Job moving stored ciphertexts onto the primary key
+
+    Streams ``(ref, token)`` pairs from ``source`` in batches, re-encrypts
+    the ones made with an older key and hands each result to
+    ``update(ref, new_token)``. Runs on a background thread; only one
+    batch is held in memory at a time.
+    """
+    def __init__(self, security, source, update, batch_size=500):
+        self.logger = get_logger()
+        self.security = security
+        self.source = source
+        self.update = update
+        self.batch_size = batch_size
+        self.stats = {"scanned": 0, "reencrypted": 0, "failed": 0}
+        self.done = threading.Event()
+        self.error = None
+        self._thread = None
+
+    def start(self):
+        """Start the job in the background"""
+        self._thread = threading.Thread(target=self.run, name="reencryption", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Wait for the job to finish; returns whether it did"""
+        return self.done.wait(timeout)
+
+    def run(self):
+        """Re-encrypt everything the source yields"""
+        try:
+            batch = []
+            for ref, token in self.source:
+                self.stats["scanned"] += 1
+                if token is not None and self.security.needs_reencryption(token):
+                    batch.append((ref, token))
+                    if len(batch) >= self.batch_size:
+                        self._reencrypt(batch)
+                        batch = []
+            if batch:
+                self._reencrypt(batch)
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"Re-encryption stopped: {e}")
+        finally:
+            self.done.set()
+
+    def _reencrypt(self, batch):
+        """Re-encrypt one batch under the primary key"""
+        plaintexts = self.security.decrypt_many(token for _, token in batch)
+        pending = [(ref, text) for (ref, _), text in zip(batch, plaintexts) if text is not None]
+        self.stats["failed"] += len(batch) - len(pending)
+        tokens = self.security.encrypt_many(text for _, text in pending)
+        for (ref, _), token in zip(pending, tokens):
+            if token is None:
+                self.stats["failed"] += 1
+                continue
+            self.update(ref, token)
+            self.stats["reencrypted"] += 1
+
+
+_keystore = None
+_keystore_lock = threading.Lock()
+
+
+def get_keystore():
+    """Get the shared keystore"""
+    global _keystore
+    with _keystore_lock:
+        if _keystore is None:
+            _keystore = KeyStore()
+        return _keystore
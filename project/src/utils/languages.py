@@ -3,6 +3,7 @@ Language support module
 Provides translations and language management
 """
 from src.utils.logger import get_logger
+from src.utils.rewriter import PhraseRewriter
 
 class LanguageManager:
     """Language Manager for handling translations"""
@@ -44,6 +45,50 @@ class LanguageManager:
                 "task_updated": "Tâche mise à jour avec succès !"
             }
         }
+        # Personality rewriting: phrase replacements and keyword notes per language
+        self.phrase_tables = {
+            "en": {
+                "phrases": {
+                    "suggest": "recommend",
+                    "think": "analyze",
+                    "look at": "evaluate",
+                    "try": "implement",
+                    "problem": "challenge",
+                    "idea": "strategy"
+                },
+                "notes": {
+                    "recommend": "This recommendation is based on current market analysis and trending data.",
+                    "strategy": "This aligns with long-term objectives and market positioning."
+                }
+            },
+            "es": {
+                "phrases": {
+                    "sugiero": "recomiendo",
+                    "creo": "analizo",
+                    "intentar": "implementar",
+                    "problema": "desafío",
+                    "idea": "estrategia"
+                },
+                "notes": {
+                    "recomiend": "Esta recomendación se basa en el análisis actual del mercado y en datos de tendencias.",
+                    "estrategia": "Esto se alinea con los objetivos a largo plazo y el posicionamiento en el mercado."
+                }
+            },
+            "fr": {
+                "phrases": {
+                    "suggère": "recommande",
+                    "pense": "analyse",
+                    "essayer": "mettre en œuvre",
+                    "problème": "défi",
+                    "idée": "stratégie"
+                },
+                "notes": {
+                    "recommand": "Cette recommandation s'appuie sur l'analyse actuelle du marché et les données de tendance.",
+                    "stratégie": "Cela s'inscrit dans les objectifs à long terme et le positionnement sur le marché."
+                }
+            }
+        }
+        self._rewriters = {}
     
     def get_text(self, key, **kwargs):
         """Get translated text for a key"""
@@ -68,6 +113,29 @@ class LanguageManager:
         """Get list of available languages"""
         return list(self.translations.keys())
     
-    def add_language(self, language_code, translations):
+    def add_language(self, language_code, translations, phrase_table=None):
         """Add a new language"""
-        self.translations[language_code] = translations
\ No newline at end of file
+        self.translations[language_code] = translations
+        if phrase_table is not None:
+            self.set_phrase_table(language_code, **phrase_table)
+    
+    def get_rewriter(self, language_code=None):
+        """Get the compiled personality rewriter for a language (English if it has no table)"""
+        language_code = language_code or self.current_language
+        if language_code not in self.phrase_tables:
+            language_code = "en"
+        rewriter = self._rewriters.get(language_code)
+        if rewriter is None:
+            table = self.phrase_tables[language_code]
+            rewriter = PhraseRewriter(table.get("phrases"), table.get("notes"))
+            self._rewriters[language_code] = rewriter
+        return rewriter
+    
+    def set_phrase_table(self, language_code, phrases=None, notes=None):
+        """Replace a language's personality phrases and/or keyword notes"""
+        table = self.phrase_tables.setdefault(language_code, {"phrases": {}, "notes": {}})
+        if phrases is not None:
+            table["phrases"] = dict(phrases)
+        if notes is not None:
+            table["notes"] = dict(notes)
+        self._rewriters.pop(language_code, None)
\ No newline at end of file
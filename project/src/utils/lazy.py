@@ -0,0 +1,62 @@
+"""
+Lazy import module
+Defers importing heavy third-party modules until they're first used
+"""
+import sys
+import types
+import importlib
+import threading
+
+
+class LazyModule(types.ModuleType):
+    """Lazy Module standing in for a module that hasn't been imported yet
+
+    The real import happens on the first attribute access (``jwt.encode``,
+    ``np.mean``...), so a module that only needs a dependency on some code
+    paths doesn't pay for it at import time. Attributes are copied onto the
+    proxy as they're looked up, so later accesses are plain attribute reads.
+    A missing dependency raises its ImportError at first use rather than
+    when the importing module loads.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr):
+        if attr.startswith("__") and attr.endswith("__"):
+            # Don't import for introspection (copy, pickle, help...)
+            raise AttributeError(attr)
+        value = getattr(self._load(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+    def _load(self):
+        """Import the real module (once)"""
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+
+def lazy_import(name):
+    """Get a module, deferring the import until first attribute access
+
+    Returns the module itself if something has already imported it.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
@@ -0,0 +1,250 @@
+"""
+Mailer module
+Provides pooled SMTP connections and a local SMTP stand-in for testing
+"""
+import os
+import asyncio
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email import message_from_bytes
+from src.utils.logger import get_logger
+
+
+class SMTPConnectionPool:
+    """SMTP Connection Pool that keeps logged-in connections open
+
+    Connections are reused across sends, so STARTTLS and login only happen
+    when a connection is first opened or after it went stale.
+    """
+    def __init__(self, host, port=587, username=None, password=None, use_tls=True,
+                 max_connections=2, idle_timeout=300, timeout=30):
+        self.logger = get_logger()
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = deque()  # (connection, last_used)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from the EMAIL_* / SMTP_* environment variables"""
+        return cls(
+            host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("EMAIL_SENDER"),
+            password=os.getenv("EMAIL_PASSWORD")
+        )
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool afterwards"""
+        with self._slots:
+            connection = self._checkout()
+            try:
+                yield connection
+            except Exception:
+                self._close(connection)
+                raise
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+
+    def send_message(self, msg):
+        """Send an email message over a pooled connection"""
+        with self.connection() as connection:
+            connection.send_message(msg)
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._close(connection)
+
+    def _checkout(self):
+        """Take a live idle connection or open a new one"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            if time.monotonic() - last_used > self.idle_timeout:
+                self._close(connection)
+                continue
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self._close(connection)
+        return self._open()
+
+    def _open(self):
+        """Open and authenticate a new connection"""
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                connection.starttls()
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            self._close(connection)
+            raise
+        return connection
+
+    def _close(self, connection):
+        """Close a connection, ignoring errors"""
+        try:
+            connection.quit()
+        except Exception:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """Get the shared SMTP pool configured from the environment"""
+    global _smtp_pool
+    with _smtp_pool_lock:
+        if _smtp_pool is None:
+            _smtp_pool = SMTPConnectionPool.from_env()
+        return _smtp_pool
+
+
+class LocalSMTPServer:
+    """Local SMTP Server that accepts mail in memory for testing
+
+    Speaks enough SMTP (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA,
+    RSET, NOOP, QUIT) for smtplib; it does not offer STARTTLS, so pair it
+    with ``SMTPConnectionPool(..., use_tls=False)``.
+    """
+    def __init__(self, host="127.0.0.1", port=0):
+        self.logger = get_logger()
+        self.host = host
+        self.port = port
+        self.messages = []
+        self.connections = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Start serving on a background thread and return the bound port"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._server.close()
+            sessions = asyncio.all_tasks(self._loop)
+            for session in sessions:
+                session.cancel()
+            self._loop.run_until_complete(asyncio.gather(*sessions, return_exceptions=True))
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-smtp", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        """Stop the server"""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle_client(self, reader, writer):
+        """Run one SMTP session"""
+        self.connections += 1
+        envelope = {"mail_from": None, "rcpt_tos": []}
+
+        async def reply(line):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply(f"220 {self.host} LocalSMTPServer ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    await reply(f"250-{self.host}")
+                    await reply("250 AUTH PLAIN LOGIN")
+                elif verb == "HELO":
+                    await reply(f"250 {self.host}")
+                elif verb == "AUTH":
+                    if command.upper().startswith("AUTH LOGIN"):
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif verb == "MAIL":
+                    envelope = {"mail_from": command[10:].strip(" <>"), "rcpt_tos": []}
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    envelope["rcpt_tos"].append(command[8:].strip(" <>"))
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data_line = await reader.readline()
+                        if data_line in (b".\r\n", b".\n", b""):
+                            break
+                        if data_line.startswith(b".."):
+                            data_line = data_line[1:]
+                        lines.append(data_line)
+                    data = b"".join(lines)
+                    self.messages.append({
+                        "mail_from": envelope["mail_from"],
+                        "rcpt_tos": envelope["rcpt_tos"],
+                        "data": data,
+                        "message": message_from_bytes(data)
+                    })
+                    await reply("250 OK: queued")
+                elif verb in ("RSET", "NOOP"):
+                    if verb == "RSET":
+                        envelope = {"mail_from": None, "rcpt_tos": []}
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.CancelledError):
+            # Cancelled on shutdown; end the session quietly
+            pass
+        finally:
+            writer.close()
@@ -4,7 +4,7 @@ Meeting management module for handling meetings and summaries
 from datetime import datetime
 import json
 from src.utils.logger import get_logger
-from src.utils.ai_assistant import AIAssistant
+from src.utils.ai_assistant import get_ai_assistant
 
 class MeetingManager:
     """Meeting Manager for handling meetings and generating summaries"""
@@ -12,7 +12,7 @@ class MeetingManager:
         self.logger = get_logger()
         self.meetings = {}
         self.summaries = {}
-        self.ai_assistant = AIAssistant()
+        self.ai_assistant = get_ai_assistant()
         
     def create_meeting(self, title, date, attendees, agenda=None):
         """Create a new meeting"""
@@ -0,0 +1,101 @@
+"""
+Message log module
+Compact per-conversation message storage built from slotted records
+"""
+
+
+class MessageRecord:
+    """Message Record holding one chat message with fixed slots"""
+    __slots__ = ("id", "conversation_id", "user_id", "content", "type",
+                 "timestamp", "status", "read_by", "reactions")
+
+    def __init__(self, id, conversation_id, user_id, content, type, timestamp, status="sent"):
+        self.id = id
+        self.conversation_id = conversation_id
+        self.user_id = user_id
+        self.content = content
+        self.type = type
+        self.timestamp = timestamp
+        self.status = status
+        self.read_by = None  # Allocated on first read receipt
+        self.reactions = None  # Allocated on first reaction
+
+    def mark_read(self, user_id):
+        """Record a read receipt"""
+        if self.read_by is None:
+            self.read_by = set()
+        self.read_by.add(user_id)
+        self.status = "read"
+
+    def add_reaction(self, user_id, reaction):
+        """Record a reaction"""
+        if self.reactions is None:
+            self.reactions = {}
+        self.reactions[user_id] = reaction
+
+    def to_dict(self, content=None):
+        """Convert to the message dict returned by ChatManager"""
+        return {
+            "id": self.id,
+            "conversation_id": self.conversation_id,
+            "user_id": self.user_id,
+            "content": self.content if content is None else content,
+            "type": self.type,
+            "timestamp": self.timestamp,
+            "status": self.status,
+            "read_by": set(self.read_by or ()),
+            "reactions": dict(self.reactions or {})
+        }
+
+
+class MessageLog:
+    """Message Log storing a conversation's records in fixed-size pages
+
+    Appends never copy existing pages, and reading a tail or range only
+    touches the pages that hold it.
+    """
+    __slots__ = ("page_size", "_pages", "_length")
+
+    def __init__(self, page_size=1024):
+        self.page_size = page_size
+        self._pages = []
+        self._length = 0
+
+    def append(self, record):
+        """Append a record and return its offset"""
+        if not self._pages or len(self._pages[-1]) == self.page_size:
+            self._pages.append([])
+        self._pages[-1].append(record)
+        self._length += 1
+        return self._length - 1
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, offset):
+        if offset < 0:
+            offset += self._length
+        if not 0 <= offset < self._length:
+            raise IndexError("message offset out of range")
+        page, index = divmod(offset, self.page_size)
+        return self._pages[page][index]
+
+    def __iter__(self):
+        for page in self._pages:
+            yield from page
+
+    def iter_range(self, start=0, stop=None):
+        """Iterate the records in [start, stop)"""
+        stop = self._length if stop is None else min(stop, self._length)
+        start = max(start, 0)
+        while start < stop:
+            page, index = divmod(start, self.page_size)
+            chunk = self._pages[page][index:index + (stop - start)]
+            yield from chunk
+            start += len(chunk)
+
+    def tail(self, limit=None):
+        """Iterate the last ``limit`` records (all when limit is None)"""
+        if limit is None:
+            return iter(self)
+        return self.iter_range(self._length - limit)
@@ -1,87 +1,360 @@
 """
 Notifications module for smart alerts
 """
+import heapq
+import itertools
+import threading
+from collections import deque, OrderedDict
 from datetime import datetime, timedelta
 from src.utils.logger import get_logger
+from src.utils.events import get_event_bus
+
+URGENT_HOURS = 4
+
 
 class NotificationManager:
-    """Notification Manager for handling smart alerts"""
-    def __init__(self):
+    """Notification Manager for handling smart alerts
+
+    Upcoming deadline and meeting reminder instants are kept in a heap that
+    is maintained from task and calendar events, so a check only pops the
+    entries that are due instead of walking every task and meeting. Each
+    item also gets an entry at its due or start time that drops it from
+    the index once it has passed. Alerts are deduplicated by item and due
+    time, so changing the lead times never repeats a delivered alert.
+
+    ``start`` runs a worker thread that sleeps until the earliest entry (or
+    the next daily summary) is due and then checks; it is woken early when
+    an earlier entry is added. The daily summary counts open tasks by due
+    date, including ones whose due time has already passed that day.
+    """
+    def __init__(self, max_notifications=500, dispatcher=None):
         self.logger = get_logger()
-        self.notifications = []
+        self.dispatcher = dispatcher
+        self.notifications = deque(maxlen=max_notifications)
         self.preferences = {
             "deadline_warning": 24,  # hours
             "meeting_reminder": 15,  # minutes
             "daily_summary": True,
             "priority_alerts": True
         }
-    
-    def check_notifications(self, tasks, meetings=None):
-        """Check and generate notifications"""
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        self._heap = []  # (fire_at, seq, ref, kind); kind "expire" drops a passed item
+        self._seq = itertools.count()
+        self._tasks = {}  # task_id -> snapshot of the fields alerts need
+        self._meetings = {}  # meeting key -> snapshot
+        self._versions = {}  # ref -> seq of its current heap entries
+        self._due_by_date = {}  # date -> set of open task ids due that day
+        self._due_dates = {}  # task id -> its date in _due_by_date
+        self._delivered = OrderedDict()
+        self._delivered_limit = max_notifications * 4
+        self._last_summary_date = None
+        self._thread = None
+        self._running = False
+
+        self.event_bus = get_event_bus()
+        for event_type in ("task.added", "task.updated", "task.completed"):
+            self.event_bus.subscribe(event_type, self._handle_task_event)
+        self.event_bus.subscribe("task.deleted", self._handle_task_deleted)
+        self.event_bus.subscribe("calendar.event_added", self._handle_calendar_event)
+        self.event_bus.subscribe("reminder.fired", self._handle_reminder)
+
+    def check_notifications(self, tasks=None, meetings=None):
+        """Check and generate notifications
+
+        Tasks and meetings passed in are synced into the index first (a
+        no-op for unchanged items); the event bus keeps it current otherwise.
+        """
         try:
-            current_time = datetime.now()
-            notifications = []
-            
-            # Task deadline notifications
-            for task in tasks:
-                if task.completed:
-                    continue
-                    
-                if task.due_date:
-                    hours_until_due = (task.due_date - current_time).total_seconds() / 3600
-                    
-                    if 0 < hours_until_due <= self.preferences["deadline_warning"]:
-                        urgency = "URGENT: " if task.priority in ["high", "critical"] else ""
-                        notifications.append({
-                            "type": "deadline",
-                            "message": f"{urgency}Task '{task.title}' is due in {int(hours_until_due)} hours",
-                            "task_id": task.id,
-                            "timestamp": current_time,
-                            "priority": "high" if hours_until_due < 4 else "medium"
-                        })
-            
-            # Meeting reminders
-            if meetings:
-                for meeting in meetings:
-                    minutes_until_meeting = (meeting["start_time"] - current_time).total_seconds() / 60
-                    
-                    if 0 < minutes_until_meeting <= self.preferences["meeting_reminder"]:
-                        notifications.append({
-                            "type": "meeting",
-                            "message": f"Meeting '{meeting['title']}' starts in {int(minutes_until_meeting)} minutes",
-                            "meeting_id": meeting.get("id"),
-                            "timestamp": current_time,
-                            "priority": "high"
-                        })
-            
-            # Daily summary (if enabled)
-            if self.preferences["daily_summary"]:
-                current_hour = current_time.hour
-                if current_hour == 9:  # 9 AM
-                    due_today = [t for t in tasks if not t.completed and t.due_date and 
-                               t.due_date.date() == current_time.date()]
+            with self._lock:
+                for task in tasks or []:
+                    self.track_task(task)
+                for meeting in meetings or []:
+                    self.track_meeting(meeting)
+
+                current_time = datetime.now()
+                notifications = []
+
+                while self._heap and self._heap[0][0] <= current_time:
+                    _, seq, ref, kind = heapq.heappop(self._heap)
+                    if self._versions.get(ref) != seq:
+                        continue  # Superseded by a later change
+                    if kind == "expire":
+                        self._expire(ref)
+                        continue
+                    notification = self._build_notification(kind, ref, current_time)
+                    if notification and self.deliver(notification, key=self._delivery_key(kind, ref)):
+                        notifications.append(notification)
+
+                for due_date in [d for d in self._due_by_date if d < current_time.date()]:
+                    for task_id in self._due_by_date.pop(due_date):
+                        self._due_dates.pop(task_id, None)
+
+                # Daily summary (if enabled), at most once per day
+                if (self.preferences["daily_summary"] and current_time.hour == 9 and
+                        self._last_summary_date != current_time.date()):
+                    due_today = self._due_by_date.get(current_time.date())
                     if due_today:
-                        notifications.append({
+                        self._last_summary_date = current_time.date()
+                        notification = {
                             "type": "summary",
                             "message": f"You have {len(due_today)} tasks due today",
                             "timestamp": current_time,
                             "priority": "medium"
-                        })
-            
-            return notifications
-            
+                        }
+                        if self.deliver(notification, key=("summary", current_time.date())):
+                            notifications.append(notification)
+
+                return notifications
+
         except Exception as e:
             self.logger.error(f"Error checking notifications: {e}")
             return []
-    
+
+    def start(self):
+        """Start checking in the background whenever an alert is due"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background worker"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def deliver(self, notification, key=None):
+        """Store and dispatch a notification unless its key was already delivered"""
+        with self._lock:
+            if key is not None:
+                if key in self._delivered:
+                    return False
+                self._delivered[key] = True
+                if len(self._delivered) > self._delivered_limit:
+                    self._delivered.popitem(last=False)
+            self.notifications.append(notification)
+        if self.dispatcher:
+            self.dispatcher.dispatch(notification)
+        return True
+
+    def attach_task_manager(self, task_manager):
+        """Index the deadlines of the tasks a task manager loaded from disk"""
+        with self._lock:
+            for task in task_manager.get_tasks():
+                self.track_task(task)
+
+    def track_task(self, task):
+        """Index (or re-index) the deadline alerts for a task"""
+        with self._lock:
+            if task.completed or not task.due_date:
+                self.untrack_task(task.id)
+                return
+
+            snapshot = {"title": task.title, "priority": task.priority, "due_date": task.due_date}
+            if self._tasks.get(task.id) == snapshot:
+                return
+
+            self.untrack_task(task.id)
+            self._tasks[task.id] = snapshot
+            self._due_dates[task.id] = task.due_date.date()
+            self._due_by_date.setdefault(task.due_date.date(), set()).add(task.id)
+            self._schedule_task(task.id)
+
+    def untrack_task(self, task_id):
+        """Drop the deadline alerts for a task"""
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            self._versions.pop(("task", task_id), None)
+            due_date = self._due_dates.pop(task_id, None)
+            task_ids = self._due_by_date.get(due_date)
+            if task_ids is not None:
+                task_ids.discard(task_id)
+                if not task_ids:
+                    del self._due_by_date[due_date]
+
+    def track_meeting(self, meeting):
+        """Index (or re-index) the reminder for a meeting"""
+        with self._lock:
+            key = meeting.get("id") or f"{meeting['title']}@{meeting['start_time'].isoformat()}"
+            snapshot = {"title": meeting["title"], "start_time": meeting["start_time"], "id": meeting.get("id")}
+            if self._meetings.get(key) == snapshot:
+                return
+            self._meetings[key] = snapshot
+            self._schedule_meeting(key)
+
+    def untrack_meeting(self, key):
+        """Drop the reminder for a meeting"""
+        with self._lock:
+            self._meetings.pop(key, None)
+            self._versions.pop(("meeting", key), None)
+
     def update_preferences(self, **kwargs):
         """Update notification preferences"""
-        self.preferences.update(kwargs)
-    
+        with self._lock:
+            self.preferences.update(kwargs)
+            if "deadline_warning" in kwargs or "meeting_reminder" in kwargs:
+                self._rebuild_heap()
+
     def get_preferences(self):
         """Get current notification preferences"""
         return self.preferences.copy()
-    
+
     def clear_notifications(self):
         """Clear all notifications"""
-        self.notifications = []
\ No newline at end of file
+        self.notifications.clear()
+
+    def _schedule_task(self, task_id):
+        """Push the warning and urgent instants for a task"""
+        due_date = self._tasks[task_id]["due_date"]
+        ref = ("task", task_id)
+        seq = next(self._seq)
+        self._versions[ref] = seq
+        warning_hours = self.preferences["deadline_warning"]
+        if warning_hours > URGENT_HOURS:
+            heapq.heappush(self._heap, (due_date - timedelta(hours=warning_hours), seq, ref, "deadline"))
+        heapq.heappush(self._heap, (due_date - timedelta(hours=min(warning_hours, URGENT_HOURS)),
+                                    seq, ref, "deadline_urgent"))
+        heapq.heappush(self._heap, (due_date, seq, ref, "expire"))
+        self._compact_if_needed()
+        self._condition.notify()
+
+    def _schedule_meeting(self, key):
+        """Push the reminder instant for a meeting"""
+        start_time = self._meetings[key]["start_time"]
+        ref = ("meeting", key)
+        seq = next(self._seq)
+        self._versions[ref] = seq
+        fire_at = start_time - timedelta(minutes=self.preferences["meeting_reminder"])
+        heapq.heappush(self._heap, (fire_at, seq, ref, "meeting"))
+        heapq.heappush(self._heap, (start_time, seq, ref, "expire"))
+        self._compact_if_needed()
+        self._condition.notify()
+
+    def _expire(self, ref):
+        """Drop the alerts of a task or meeting whose due or start time has passed
+
+        A task stays counted in _due_by_date until its day is over, for the
+        daily summary.
+        """
+        if ref[0] == "task":
+            self._tasks.pop(ref[1], None)
+            self._versions.pop(ref, None)
+        else:
+            self.untrack_meeting(ref[1])
+
+    def _next_wakeup(self, now):
+        """Seconds until the next heap entry or daily summary is due (lock held)"""
+        instants = [self._heap[0][0]] if self._heap else []
+        if self.preferences["daily_summary"]:
+            summary_at = now.replace(hour=9, minute=0, second=0, microsecond=0)
+            if now.hour >= 9:
+                summary_at += timedelta(days=1)
+            instants.append(summary_at)
+        if not instants:
+            return None
+        return max(0, (min(instants) - now).total_seconds())
+
+    def _run(self):
+        """Worker loop: sleep until something is due, then check"""
+        while True:
+            self.check_notifications()
+            with self._condition:
+                if not self._running:
+                    return
+                timeout = self._next_wakeup(datetime.now())
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+
+    def _delivery_key(self, kind, ref):
+        """Dedup key for an alert: the item and its due or start time"""
+        if kind == "meeting":
+            return (kind, ref, self._meetings[ref[1]]["start_time"])
+        return (kind, ref, self._tasks[ref[1]]["due_date"])
+
+    def _compact_if_needed(self):
+        """Drop superseded heap entries once they outnumber live ones"""
+        live = 3 * len(self._tasks) + 2 * len(self._meetings)
+        if len(self._heap) > 2 * live + 64:
+            self._heap = [entry for entry in self._heap if self._versions.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def _rebuild_heap(self):
+        """Recompute every instant after a preference change"""
+        self._heap = []
+        self._versions = {}
+        for task_id in self._tasks:
+            self._schedule_task(task_id)
+        for key in self._meetings:
+            self._schedule_meeting(key)
+
+    def _build_notification(self, kind, ref, current_time):
+        """Build the notification for a popped heap entry"""
+        if kind == "meeting":
+            meeting = self._meetings.get(ref[1])
+            if not meeting:
+                return None
+            minutes_until_meeting = (meeting["start_time"] - current_time).total_seconds() / 60
+            if minutes_until_meeting <= 0:
+                return None
+            return {
+                "type": "meeting",
+                "message": f"Meeting '{meeting['title']}' starts in {int(minutes_until_meeting)} minutes",
+                "meeting_id": meeting["id"],
+                "timestamp": current_time,
+                "priority": "high"
+            }
+
+        task = self._tasks.get(ref[1])
+        if not task:
+            return None
+        hours_until_due = (task["due_date"] - current_time).total_seconds() / 3600
+        if hours_until_due <= 0:
+            return None
+        if kind == "deadline" and hours_until_due < URGENT_HOURS:
+            return None  # The urgent entry covers this window
+        urgency = "URGENT: " if task["priority"] in ["high", "critical"] else ""
+        return {
+            "type": "deadline",
+            "message": f"{urgency}Task '{task['title']}' is due in {int(hours_until_due)} hours",
+            "task_id": ref[1],
+            "timestamp": current_time,
+            "priority": "high" if hours_until_due < URGENT_HOURS else "medium"
+        }
+
+    def _handle_task_event(self, event):
+        """Keep the index in sync with task changes"""
+        task = event["payload"].get("task")
+        if task is not None:
+            self.track_task(task)
+
+    def _handle_task_deleted(self, event):
+        """Drop alerts for a deleted task"""
+        self.untrack_task(event["payload"]["task_id"])
+
+    def _handle_calendar_event(self, event):
+        """Index reminders for new calendar events"""
+        self.track_meeting(event["payload"]["event"])
+
+    def _handle_reminder(self, event):
+        """Deliver a reminder fired by the reminder service"""
+        payload = event["payload"]
+        notification = {
+            "type": "reminder",
+            "message": payload["message"],
+            "timestamp": event["timestamp"],
+            "priority": payload["priority"]
+        }
+        if payload.get("task_id"):
+            notification["task_id"] = payload["task_id"]
+        # A duplicate key was delivered before, so either way it's handled
+        self.deliver(notification, key=("reminder", payload["key"], payload["fire_at"]))
+        if payload.get("ack"):
+            payload["ack"]()
@@ -0,0 +1,180 @@
+"""
+Presence module
+TTL-indexed typing and presence state with push notifications to listeners
+"""
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from src.utils.logger import get_logger
+
+PRESENCE_SCOPE = "presence"
+
+
+class PresenceStore:
+    """Presence Store holding short-lived per-user state such as typing
+
+    Every entry is keyed by (kind, scope, user_id) and expires after its
+    TTL. Expiry times sit in a heap (stale entries are skipped lazily) and
+    a worker thread sleeps until the earliest one, so expired entries are
+    evicted and announced without anyone polling. Listeners subscribe to a
+    scope (or to everything) and are called only when state changes: an
+    entry appearing, being cleared or expiring, or a one-off event such as
+    a read receipt. Refreshing a live entry only extends its TTL.
+    """
+    def __init__(self, ttls=None, clock=time.monotonic):
+        self.logger = get_logger()
+        self.ttls = {"typing": 5, "presence": 60}
+        self.ttls.update(ttls or {})
+        self.clock = clock
+        self._heap = []  # (expires_at, seq, key)
+        self._entries = {}  # key -> (expires_at, seq, value)
+        self._by_scope = {}  # (kind, scope) -> set of user ids
+        self._listeners = {}  # scope (None for all) -> {token: callback}
+        self._expired = []  # evicted keys waiting to be announced
+        self._tokens = itertools.count()
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def set(self, kind, scope, user_id, value=True, ttl=None):
+        """Set or refresh an entry; listeners hear about new entries only"""
+        key = (kind, scope, user_id)
+        ttl = self.ttls.get(kind, 60) if ttl is None else ttl
+        with self._condition:
+            self._evict_expired()
+            expires_at = self.clock() + ttl
+            seq = next(self._seq)
+            current = self._entries.get(key)
+            self._entries[key] = (expires_at, seq, value)
+            self._by_scope.setdefault((kind, scope), set()).add(user_id)
+            heapq.heappush(self._heap, (expires_at, seq, key))
+            if len(self._heap) > 2 * len(self._entries) + 64:
+                self._heap = [e for e in self._heap if self._entries.get(e[2], (None, None))[1] == e[1]]
+                heapq.heapify(self._heap)
+            # Only wake the worker if this is now the earliest expiry
+            if self._heap[0][1] == seq:
+                self._condition.notify()
+        if current is None or current[2] != value:
+            self._notify(kind, scope, user_id, True, value)
+
+    def clear(self, kind, scope, user_id):
+        """Remove an entry"""
+        with self._condition:
+            removed = self._remove((kind, scope, user_id))
+        if removed:
+            self._notify(kind, scope, user_id, False)
+        return removed
+
+    def get(self, kind, scope):
+        """Get {user_id: value} for the live entries of a scope"""
+        with self._condition:
+            self._evict_expired()
+            users = self._by_scope.get((kind, scope), ())
+            return {user_id: self._entries[(kind, scope, user_id)][2] for user_id in users}
+
+    def publish(self, kind, scope, user_id, **data):
+        """Push a one-off event (not stored) to a scope's listeners"""
+        self._notify(kind, scope, user_id, True, data or None)
+
+    def subscribe(self, callback, scope=None):
+        """Call ``callback(change)`` for changes in a scope (None for all)"""
+        token = next(self._tokens)
+        with self._condition:
+            self._listeners.setdefault(scope, {})[token] = callback
+        self.start()
+        return token
+
+    def unsubscribe(self, token):
+        """Remove a listener"""
+        with self._condition:
+            for scope, listeners in list(self._listeners.items()):
+                if listeners.pop(token, None) is not None:
+                    if not listeners:
+                        del self._listeners[scope]
+                    return True
+        return False
+
+    def start(self):
+        """Start the expiry worker"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="presence", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the expiry worker"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _remove(self, key):
+        """Drop an entry and its scope index (heap entry is skipped lazily)"""
+        if self._entries.pop(key, None) is None:
+            return False
+        kind, scope, user_id = key
+        users = self._by_scope.get((kind, scope))
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._by_scope[(kind, scope)]
+        return True
+
+    def _evict_expired(self):
+        """Pop expired entries off the heap; returns their keys"""
+        now = self.clock()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry and entry[1] == seq:
+                self._remove(key)
+                expired.append(key)
+        if expired and self._listeners:
+            # Announce from the worker thread, outside the caller's lock
+            self._expired.extend(expired)
+            self._condition.notify()
+        return expired
+
+    def _run(self):
+        """Worker loop: sleep until the next expiry, then announce it"""
+        while True:
+            with self._condition:
+                while self._running and not self._expired:
+                    self._evict_expired()
+                    if self._expired:
+                        break
+                    timeout = self._heap[0][0] - self.clock() if self._heap else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+                expired, self._expired = self._expired, []
+            for kind, scope, user_id in expired:
+                self._notify(kind, scope, user_id, False)
+
+    def _notify(self, kind, scope, user_id, active, value=None):
+        """Fan a change out to the scope's listeners and the catch-all ones"""
+        change = {
+            "kind": kind,
+            "scope": scope,
+            "user_id": user_id,
+            "active": active,
+            "value": value,
+            "timestamp": datetime.now()
+        }
+        with self._condition:
+            callbacks = list(self._listeners.get(scope, {}).values())
+            if scope is not None:
+                callbacks.extend(self._listeners.get(None, {}).values())
+        for callback in callbacks:
+            try:
+                callback(change)
+            except Exception as e:
+                self.logger.error(f"Error in presence listener: {e}")
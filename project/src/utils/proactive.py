@@ -0,0 +1,153 @@
+"""
+Proactive module
+Precomputes proactive suggestions in the background
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.logger import get_logger
+
+
+class ProactiveRefresher:
+    """Proactive Refresher computing suggestions on its own cadence
+
+    ``sources`` is a list of ``(name, callable)``; each callable returns a
+    suggestion string or None. A worker thread runs them all at once every
+    ``interval`` seconds (the first time after ``delay``) and caches each
+    result for ``ttl`` seconds, so readers never wait on a search or API
+    call. A source still running from the last refresh is not started
+    again, and one slower than ``timeout`` keeps its previous result until
+    it finishes. ``stop`` cuts that wait short.
+
+    ``take`` hands out the suggestions of each refresh once, in source
+    order; ``suggestions`` returns whatever is cached and fresh.
+    """
+    def __init__(self, sources, interval=1800, ttl=None, delay=None, timeout=30):
+        self.logger = get_logger()
+        self.sources = list(sources)
+        self.interval = interval
+        self.ttl = interval if ttl is None else ttl
+        self.delay = interval if delay is None else delay
+        self.timeout = timeout
+        self.last_refresh = None
+        self._results = {}  # name -> (suggestion, computed_at)
+        self._inflight = {}  # name -> Future
+        self._generation = 0
+        self._taken = 0
+        self._condition = threading.Condition()
+        self._next_run = None
+        self._pool = None
+        self._thread = None
+        self._running = False
+        self._stopping = False
+
+    def start(self):
+        """Start refreshing in the background"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._stopping = False
+            self._next_run = time.monotonic() + self.delay
+        self._thread = threading.Thread(target=self._run, name="proactive-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the refresher"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def refresh_now(self):
+        """Ask the worker to refresh right away"""
+        with self._condition:
+            self._next_run = time.monotonic()
+            self._condition.notify()
+
+    def refresh(self):
+        """Run every source concurrently and cache the results"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.sources)),
+                                            thread_name_prefix="proactive")
+        started = []
+        for name, source in self.sources:
+            future = self._inflight.get(name)
+            if future is None or future.done():
+                # The worker stores its own result, so a future is only done
+                # once its suggestion is cached and visible to take()
+                future = self._pool.submit(self._compute, name, source)
+                future.add_done_callback(self._source_done)
+                self._inflight[name] = future
+            started.append(future)
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            # Wait on the condition rather than the futures, so stop() wakes us
+            pending = [future for future in started if not future.done()]
+            while pending and not self._stopping and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+                pending = [future for future in pending if not future.done()]
+            if self._stopping:
+                return self.suggestions()
+        if pending:
+            self.logger.warning(f"{len(pending)} proactive source(s) still running after {self.timeout}s")
+        with self._condition:
+            self._generation += 1
+            self.last_refresh = time.monotonic()
+        return self.suggestions()
+
+    def suggestions(self, now=None):
+        """Cached suggestions that are still fresh, in source order"""
+        now = time.monotonic() if now is None else now
+        with self._condition:
+            results = dict(self._results)
+        fresh = []
+        for name, _ in self.sources:
+            suggestion, computed_at = results.get(name, (None, None))
+            if suggestion and now - computed_at < self.ttl:
+                fresh.append(suggestion)
+        return fresh
+
+    def take(self):
+        """Suggestions from a refresh not handed out yet, or None"""
+        with self._condition:
+            if self._taken == self._generation:
+                return None
+            self._taken = self._generation
+        return self.suggestions() or None
+
+    def _compute(self, name, source):
+        """Run a source on the pool and cache its result"""
+        try:
+            suggestion = source()
+        except Exception as e:
+            self.logger.error(f"Error in proactive source {name}: {e}")
+            return
+        with self._condition:
+            self._results[name] = (suggestion, time.monotonic())
+
+    def _source_done(self, future):
+        """Wake a refresh waiting on its sources"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        """Worker loop: refresh whenever the next run is due"""
+        while True:
+            with self._condition:
+                while self._running and time.monotonic() < self._next_run:
+                    self._condition.wait(self._next_run - time.monotonic())
+                if not self._running:
+                    return
+                self._next_run = time.monotonic() + self.interval
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Error refreshing proactive suggestions: {e}")
@@ -0,0 +1,245 @@
+"""
+Reminders module
+Fires task and secretary reminders at their due time
+"""
+import os
+import json
+import heapq
+import itertools
+import threading
+from datetime import datetime, timedelta
+from src.utils.logger import get_logger
+from src.utils.events import get_event_bus
+
+
+class ReminderService:
+    """Reminder Service keeping every reminder in one time-ordered heap
+
+    A worker thread sleeps until the earliest reminder is due and is woken
+    early when an earlier one is added. Fired reminders are published as
+    ``reminder.fired`` events; a subscriber that delivers one (such as
+    NotificationManager) calls the ``ack`` in the payload. A reminder nobody
+    acknowledged is retried after ``retry_delay``. Task reminders live on
+    ``Task.reminder`` in the task store, so they are re-indexed from the
+    TaskManager on startup and only cleared once delivered. Other reminders
+    (e.g. the secretary's) are saved to ``data_file``, next to the task
+    data, until delivered and reloaded by ``attach_task_manager``.
+    """
+    def __init__(self, retry_delay=timedelta(minutes=5), data_file="data/reminders.json"):
+        self.logger = get_logger()
+        self.event_bus = get_event_bus()
+        self.task_manager = None
+        self.retry_delay = retry_delay
+        self.data_file = data_file
+        self._heap = []  # (fire_at, seq, key)
+        self._reminders = {}  # key -> reminder dict
+        self._stored = {}  # key -> saved form of an undelivered non-task reminder
+        self._file_lock = threading.Lock()
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        for event_type in ("task.added", "task.updated", "task.completed"):
+            self.event_bus.subscribe(event_type, self._handle_task_event)
+        self.event_bus.subscribe("task.deleted", self._handle_task_deleted)
+
+    def attach_task_manager(self, task_manager):
+        """Index the reminders stored on a task manager's tasks and the
+        saved reminders next to its data file
+
+        Reminders that came due while the application was closed fire now.
+        """
+        self.task_manager = task_manager
+        self.data_file = os.path.join(os.path.dirname(task_manager.data_file), "reminders.json")
+        self._load()
+        for task in task_manager.get_tasks():
+            self.track_task(task, catch_up=True)
+
+    def add_reminder(self, key, fire_at, message, source="custom", priority="medium", **details):
+        """Add or replace a reminder"""
+        reminder = {
+            "key": key,
+            "fire_at": fire_at,
+            "message": message,
+            "source": source,
+            "priority": priority,
+            "seq": next(self._seq)
+        }
+        reminder.update(details)
+        if source != "task":
+            self._store(key, dict(reminder, fire_at=fire_at.isoformat()))
+        with self._condition:
+            self._reminders[key] = reminder
+            heapq.heappush(self._heap, (fire_at, reminder["seq"], key))
+            if len(self._heap) > 2 * len(self._reminders) + 64:
+                self._heap = [e for e in self._heap if e[2] in self._reminders and
+                              self._reminders[e[2]]["seq"] == e[1]]
+                heapq.heapify(self._heap)
+            # Only wake the worker if this is now the earliest reminder
+            if self._heap[0][1] == reminder["seq"]:
+                self._condition.notify()
+        return reminder
+
+    def remove_reminder(self, key):
+        """Remove a reminder (its heap entry is skipped lazily)"""
+        self._store(key, None)
+        with self._condition:
+            return self._reminders.pop(key, None) is not None
+
+    def track_task(self, task, catch_up=False):
+        """Index, move or drop the reminder of a task
+
+        A reminder set to a time that has already passed is skipped, unless
+        ``catch_up`` is set (it came due while the application was closed).
+        A reminder waiting for a retry keeps its retry time.
+        """
+        key = f"task:{task.id}"
+        if task.reminder and not task.completed:
+            current = self._reminders.get(key)
+            if current and current["due"] == task.reminder and current["title"] == task.title:
+                return
+            if current and current["due"] == task.reminder:
+                fire_at = current["fire_at"]  # Only the title changed
+            elif task.reminder <= datetime.now() and not catch_up:
+                self.remove_reminder(key)
+                return
+            else:
+                fire_at = task.reminder
+            self.add_reminder(key, fire_at, f"Reminder: {task.title}", source="task",
+                              priority=task.priority, task_id=task.id, title=task.title, due=task.reminder)
+        else:
+            self.remove_reminder(key)
+
+    def get_upcoming(self, limit=10):
+        """Get the next reminders in due order"""
+        with self._condition:
+            live = list(self._reminders.values())
+        return sorted(live, key=lambda r: r["fire_at"])[:limit]
+
+    def start(self):
+        """Start the worker thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="reminders", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Worker loop: sleep until the next reminder is due, then fire it"""
+        while True:
+            with self._condition:
+                due = []
+                while self._running and not due:
+                    now = datetime.now()
+                    while self._heap and self._heap[0][0] <= now:
+                        _, seq, key = heapq.heappop(self._heap)
+                        reminder = self._reminders.get(key)
+                        if reminder and reminder["seq"] == seq:
+                            del self._reminders[key]
+                            due.append(reminder)
+                    if due:
+                        break
+                    timeout = (self._heap[0][0] - now).total_seconds() if self._heap else None
+                    self._condition.wait(timeout)
+                if not self._running:
+                    return
+            for reminder in due:
+                self._fire(reminder)
+
+    def _fire(self, reminder):
+        """Hand a due reminder to the notification path"""
+        acknowledged = []
+        try:
+            self.event_bus.publish("reminder.fired", {
+                "key": reminder["key"],
+                "message": reminder["message"],
+                "source": reminder["source"],
+                "priority": reminder["priority"],
+                "fire_at": reminder["fire_at"],
+                "task_id": reminder.get("task_id"),
+                "ack": lambda: acknowledged.append(True)
+            })
+            if not acknowledged:
+                # Nobody delivered it: keep the stored reminder and try again later
+                self.logger.warning(f"Reminder {reminder['key']} was not delivered, retrying in {self.retry_delay}")
+                details = {k: v for k, v in reminder.items()
+                           if k not in ("key", "fire_at", "message", "source", "priority", "seq")}
+                self.add_reminder(reminder["key"], datetime.now() + self.retry_delay, reminder["message"],
+                                  source=reminder["source"], priority=reminder["priority"], **details)
+            elif reminder["source"] == "task":
+                if self.task_manager:
+                    # Clear the stored reminder so it doesn't fire again after a restart
+                    self.task_manager.update_task(reminder["task_id"], reminder=None)
+            else:
+                self._store(reminder["key"], None)
+        except Exception as e:
+            self.logger.error(f"Error firing reminder {reminder['key']}: {e}")
+
+    def _store(self, key, saved):
+        """Save (or with None, forget) a non-task reminder in data_file"""
+        with self._file_lock:
+            if saved is None:
+                if self._stored.pop(key, None) is None:
+                    return
+            else:
+                self._stored[key] = saved
+            try:
+                directory = os.path.dirname(self.data_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.data_file}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(list(self._stored.values()), f, indent=2)
+                os.replace(tmp_path, self.data_file)
+            except Exception as e:
+                self.logger.error(f"Error saving reminders: {e}")
+
+    def _load(self):
+        """Re-index the reminders saved in data_file"""
+        try:
+            if not os.path.exists(self.data_file):
+                return
+            with open(self.data_file, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading reminders: {e}")
+            return
+        for entry in saved:
+            details = {k: v for k, v in entry.items()
+                       if k not in ("key", "fire_at", "message", "source", "priority", "seq")}
+            self.add_reminder(entry["key"], datetime.fromisoformat(entry["fire_at"]), entry["message"],
+                              source=entry["source"], priority=entry["priority"], **details)
+
+    def _handle_task_event(self, event):
+        """Keep task reminders in sync with task changes"""
+        task = event["payload"].get("task")
+        if task is not None:
+            self.track_task(task)
+
+    def _handle_task_deleted(self, event):
+        """Drop the reminder of a deleted task"""
+        self.remove_reminder(f"task:{event['payload']['task_id']}")
+
+
+_reminder_service = None
+_reminder_service_lock = threading.Lock()
+
+
+def get_reminder_service():
+    """Get the shared reminder service"""
+    global _reminder_service
+    with _reminder_service_lock:
+        if _reminder_service is None:
+            _reminder_service = ReminderService()
+        return _reminder_service
@@ -4,15 +4,16 @@ Provides report generation and email functionality
 """
 import os
 from datetime import datetime, timedelta
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from src.utils.logger import get_logger
+from src.utils.mailer import get_smtp_pool
 
 class ReportManager:
     """Report Manager class for generating and sending task reports"""
-    def __init__(self):
+    def __init__(self, smtp_pool=None):
         self.logger = get_logger()
+        self.smtp_pool = smtp_pool or get_smtp_pool()
     
     def generate_summary_report(self, tasks):
         """Generate a summary report of tasks"""
@@ -117,8 +118,6 @@ class ReportManager:
             # Email configuration
             sender_email = os.getenv("EMAIL_SENDER")
             sender_password = os.getenv("EMAIL_PASSWORD")
-            smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-            smtp_port = int(os.getenv("SMTP_PORT", "587"))
             
             if not all([sender_email, sender_password]):
                 raise ValueError("Email configuration is incomplete")
@@ -132,11 +131,8 @@ class ReportManager:
             # Add report content
             msg.attach(MIMEText(report_content, "plain"))
             
-            # Send email
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.send_message(msg)
+            # Send email over a pooled, already authenticated connection
+            self.smtp_pool.send_message(msg)
             
             return True
             
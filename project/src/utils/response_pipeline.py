@@ -0,0 +1,198 @@
+"""
+Response pipeline module
+Generates AI replies in the background with bounded concurrency and streaming
+"""
+import asyncio
+import inspect
+import threading
+from src.utils.logger import get_logger
+
+
+class ResponsePipeline:
+    """Response Pipeline running reply generation on an asyncio loop
+
+    Jobs are keyed (ChatManager uses the conversation id) and at most one
+    job per key is live: submitting a new one cancels the previous job.
+    ``max_concurrency`` jobs generate at once and at most ``max_pending``
+    wait; beyond that new jobs are rejected rather than queued.
+
+    The responder receives the job's payload and may return a string, an
+    iterable of string chunks, a coroutine or an async iterator of chunks.
+    Blocking responders run on a worker thread. Every chunk is passed to
+    ``on_chunk(key, payload, chunk, index)`` as it arrives and the joined
+    text to ``on_complete(key, payload, text)`` once the job finishes.
+    """
+    def __init__(self, responder, on_complete, on_chunk=None, max_concurrency=4, max_pending=100):
+        self.logger = get_logger()
+        self.responder = responder
+        self.on_complete = on_complete
+        self.on_chunk = on_chunk
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.stats = {"completed": 0, "cancelled": 0, "failed": 0, "rejected": 0}
+        self._jobs = {}  # key -> asyncio task
+        self._semaphore = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the pipeline loop on a background thread"""
+        with self._lock:
+            if self._thread:
+                return
+            ready = threading.Event()
+
+            def run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+                ready.set()
+                loop.run_forever()
+                loop.close()
+
+            self._thread = threading.Thread(target=run, name="response-pipeline", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, key, payload):
+        """Queue a reply job, cancelling any live job with the same key
+
+        Returns False if the pipeline is already at ``max_pending``.
+        """
+        if not self._loop:
+            self.start()
+        with self._lock:
+            if len(self._jobs) >= self.max_concurrency + self.max_pending and key not in self._jobs:
+                self.stats["rejected"] += 1
+                return False
+            # Reserve the slot now; the loop replaces it with the task
+            self._jobs.setdefault(key, None)
+        self._loop.call_soon_threadsafe(self._start_job, key, payload)
+        return True
+
+    def cancel(self, key):
+        """Cancel the live job for a key"""
+        if not self._loop:
+            return False
+        with self._lock:
+            if key not in self._jobs:
+                return False
+        self._loop.call_soon_threadsafe(self._cancel_job, key)
+        return True
+
+    def pending(self):
+        """Number of live jobs (generating or waiting)"""
+        with self._lock:
+            return len(self._jobs)
+
+    def join(self, timeout=None):
+        """Block until every live job has finished"""
+        if not self._loop:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._wait_jobs(), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+
+    def stop(self, timeout=10):
+        """Cancel live jobs and stop the loop"""
+        if not self._loop:
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_all(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop = None
+        self._thread = None
+
+    def _start_job(self, key, payload):
+        """Create the task for a job, superseding the previous one"""
+        previous = self._jobs.get(key)
+        if previous is not None:
+            previous.cancel()
+        task = self._loop.create_task(self._run_job(key, payload))
+        # A done callback also runs for tasks cancelled before they started
+        task.add_done_callback(lambda done: self._finish_job(key, done))
+        with self._lock:
+            self._jobs[key] = task
+
+    def _finish_job(self, key, task):
+        """Forget a finished job"""
+        if task.cancelled():
+            self.stats["cancelled"] += 1
+        with self._lock:
+            if self._jobs.get(key) is task:
+                del self._jobs[key]
+
+    def _cancel_job(self, key):
+        """Cancel a job's task"""
+        task = self._jobs.get(key)
+        if task is not None:
+            task.cancel()
+
+    async def _run_job(self, key, payload):
+        """Generate, stream and deliver one reply"""
+        try:
+            async with self._semaphore:
+                chunks = []
+                async for chunk in self._stream(payload):
+                    if self.on_chunk:
+                        self.on_chunk(key, payload, chunk, len(chunks))
+                    chunks.append(chunk)
+            text = "".join(chunks)
+            if text:
+                self.on_complete(key, payload, text)
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"Error generating response for {key}: {e}")
+
+    async def _stream(self, payload):
+        """Normalise whatever the responder returns into async chunks"""
+        loop = asyncio.get_running_loop()
+        if inspect.iscoroutinefunction(self.responder) or inspect.isasyncgenfunction(self.responder):
+            result = self.responder(payload)
+        else:
+            result = await loop.run_in_executor(None, self.responder, payload)
+        if inspect.isawaitable(result):
+            result = await result
+        if result is None:
+            return
+        if isinstance(result, str):
+            yield result
+        elif hasattr(result, "__aiter__"):
+            async for chunk in result:
+                yield chunk
+        else:
+            # Blocking iterator: pull each chunk on a worker thread
+            iterator = iter(result)
+            done = object()
+            while True:
+                chunk = await loop.run_in_executor(None, next, iterator, done)
+                if chunk is done:
+                    break
+                yield chunk
+
+    async def _wait_jobs(self):
+        """Wait until no job is live"""
+        while True:
+            with self._lock:
+                tasks = [task for task in self._jobs.values() if task is not None]
+                reserved = len(self._jobs) - len(tasks)
+            if not tasks and not reserved:
+                return
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            else:
+                await asyncio.sleep(0)
+
+    async def _cancel_all(self):
+        """Cancel every live job"""
+        with self._lock:
+            tasks = [task for task in self._jobs.values() if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
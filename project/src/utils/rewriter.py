@@ -0,0 +1,102 @@
+"""
+Rewriter module
+Single-pass phrase rewriting for the assistant's personality
+"""
+import re
+
+
+class PhraseRewriter:
+    """Phrase Rewriter compiled once from a phrase table
+
+    ``phrases`` maps text to its replacement (case-sensitive, like
+    ``str.replace``); ``notes`` maps keywords to a sentence appended when
+    the rewritten text mentions them (case-insensitive).
+
+    The phrases are compiled into one regex shaped like a prefix trie, so
+    ``rewrite`` replaces them all in a single scan, preferring the longest
+    phrase at each position, and a replacement is never rewritten again.
+    A keyword inside a replacement is therefore sure to be in the result,
+    and the lowercase copy of the text is only searched for the others.
+    """
+    def __init__(self, phrases=None, notes=None):
+        self.phrases = dict(phrases or {})
+        self.notes = dict(notes or {})
+        self._keywords = [(keyword, keyword.lower()) for keyword in self.notes]
+        self._note_texts = {keyword: f"\n\n{note}" for keyword, note in self.notes.items()}
+        self._pattern = re.compile(_trie_pattern(self.phrases)) if self.phrases else None
+        # phrase -> keywords its replacement puts in the result
+        self._introduces = {}
+        for phrase, replacement in self.phrases.items():
+            lowered = replacement.lower()
+            introduced = tuple(keyword for keyword, lowered_keyword in self._keywords
+                               if lowered_keyword in lowered)
+            if introduced:
+                self._introduces[phrase] = introduced
+
+    def rewrite(self, text):
+        """Rewrite text in one pass; returns (text, keywords mentioned)"""
+        text, known = self._replace(text)
+        return text, self._mentioned(text, known)
+
+    def apply(self, text):
+        """Rewrite text and append the notes for the keywords it mentions"""
+        text, known = self._replace(text)
+        for keyword in self._mentioned(text, known):
+            text += self._note_texts[keyword]
+        return text
+
+    def _replace(self, text):
+        """Replace the phrases; returns (text, keywords known to be in it)"""
+        if self._pattern is None:
+            return text, ()
+        hits = []
+        phrases = self.phrases
+
+        def replace(match):
+            phrase = match.group()
+            hits.append(phrase)
+            return phrases[phrase]
+
+        text = self._pattern.sub(replace, text)
+        known = ()
+        for phrase in hits:
+            known += self._introduces.get(phrase, ())
+        return text, known
+
+    def _mentioned(self, text, known):
+        """Keywords in the rewritten text, in notes order"""
+        mentioned = []
+        lowered = None
+        for keyword, lowered_keyword in self._keywords:
+            if keyword not in known:
+                if lowered is None:
+                    lowered = text.lower()
+                if lowered_keyword not in lowered:
+                    continue
+            mentioned.append(keyword)
+        return mentioned
+
+
+def _trie_pattern(words):
+    """Regex matching any of ``words``, factored by common prefix
+
+    Python's re tries alternatives one by one, so a flat ``a|b|c`` slows
+    down with every word added; sharing prefixes keeps each position to a
+    few character tests. Optional tails are greedy, so the longest word
+    wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = None
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
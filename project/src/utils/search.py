@@ -1,8 +1,10 @@
 """
 Search module for general web search capabilities
 """
-import requests
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
 
 class SearchAssistant:
     """Search Assistant for web searches and information retrieval"""
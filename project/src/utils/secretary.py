@@ -1,6 +1,7 @@
 """
 Secretary module for advanced executive assistance
 """
+import uuid
 from datetime import datetime, timedelta
 from src.utils.logger import get_logger
 from src.utils.meetings import MeetingManager
@@ -8,6 +9,7 @@ from src.utils.calendar import CalendarManager
 from src.utils.contacts import ContactManager
 from src.utils.templates import TemplateManager
 from src.utils.reports import ReportManager
+from src.utils.reminders import get_reminder_service
 
 class SecretaryAssistant:
     """Secretary Assistant for executive-level support"""
@@ -20,6 +22,8 @@ class SecretaryAssistant:
         self.report_manager = ReportManager()
         self.tasks = []
         self.reminders = []
+        self.reminder_service = get_reminder_service()
+        self.reminder_service.start()
         self.preferences = {
             "meeting_buffer": 15,  # minutes
             "work_hours": {"start": 9, "end": 17},
@@ -124,8 +128,17 @@ class SecretaryAssistant:
             # Calculate optimal reminder time
             reminder_time = self._calculate_reminder_time(due_date, priority)
             reminder["reminder_time"] = reminder_time
+            reminder["id"] = f"secretary:{uuid.uuid4().hex}"
             
             self.reminders.append(reminder)
+            title = task if isinstance(task, str) else getattr(task, "title", task)
+            self.reminder_service.add_reminder(
+                reminder["id"],
+                reminder_time,
+                f"Reminder: {title} is due at {due_date.strftime('%Y-%m-%d %H:%M')}",
+                source="secretary",
+                priority=priority
+            )
             return reminder
         except Exception as e:
             self.logger.error(f"Error setting reminder: {e}")
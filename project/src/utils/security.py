@@ -2,144 +2,464 @@
 Security module for protecting virtual assistant data and interactions
 """
 import os
-import jwt
-import bcrypt
+import re
 import secrets
+import hmac
+import hashlib
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from cryptography.fernet import Fernet
 from src.utils.logger import get_logger
+from src.utils.session_store import get_session_store
+from src.utils.keystore import get_keystore, ReencryptionJob
+from src.utils.token_cache import get_token_cache
+from src.utils.audit import get_audit_log
+from src.utils.lazy import lazy_import
+
+jwt = lazy_import("jwt")
+bcrypt = lazy_import("bcrypt")
+aead = lazy_import("cryptography.hazmat.primitives.ciphers.aead")
+
+ENVELOPE_PREFIX = b"gcm1."
+
+# Characters kept by sanitize_input besides letters and digits, per context
+SANITIZE_PROFILES = {
+    "default": " .,!?-_@#$%^&*()[]{}",
+    "speech": " .,!?-_'\":;",
+    "identifier": "-_.@"
+}
+
+
+def _compile_sanitizer(allowed):
+    """Build (ASCII deletion table, pattern) for an allowlist
+
+    ASCII text goes through str.translate; anything else through a regex
+    whose ``\\w`` matches exactly the characters where str.isalnum() is
+    true, plus "_", so "_" is dropped separately unless it is allowed.
+    """
+    table = {code: None for code in range(128) if not (chr(code).isalnum() or chr(code) in allowed)}
+    dropped = "[^\\w" + re.escape(allowed) + "]"
+    if "_" not in allowed:
+        dropped = f"(?:{dropped}|_)"
+    return table, re.compile(dropped + "+")
+
+
+def _sanitize(input_str, sanitizer):
+    """Apply a compiled sanitizer"""
+    table, pattern = sanitizer
+    if input_str.isascii():
+        return input_str.translate(table).strip()
+    return pattern.sub('', input_str).strip()
 
 class SecurityManager:
-    """Security Manager for handling authentication and encryption"""
-    def __init__(self):
+    """Security Manager for handling authentication and encryption
+
+    Sessions and failed logins live in a session store shared by every
+    SecurityManager (and, with the SQLite store, every process). Keys come
+    from the shared keystore, so any instance can decrypt another's data.
+    """
+    def __init__(self, session_store=None, keystore=None, token_cache=None, audit_log=None):
         self.logger = get_logger()
-        self.secret_key = os.getenv('JWT_SECRET_KEY', secrets.token_hex(32))
-        self.encryption_key = os.getenv('ENCRYPTION_KEY', Fernet.generate_key())
-        self.fernet = Fernet(self.encryption_key)
+        self.audit_log = audit_log if audit_log is not None else get_audit_log()
+        self.keystore = keystore or get_keystore()
+        self.secret_key = self.keystore.jwt_secret
+        self.token_cache = token_cache if token_cache is not None else get_token_cache()
+        self._token_namespace = hashlib.sha256(self.secret_key.encode()).digest()
         self.session_duration = timedelta(hours=24)
         self.max_login_attempts = 3
-        self.login_attempts = {}
-        self.blocked_ips = set()
-        self.active_sessions = {}
+        self.login_window = timedelta(hours=1)
+        self.sessions = session_store or get_session_store()
+        self.sweep_interval = 60  # seconds between expired-session sweeps
+        self._last_sweep = 0
+        self.envelope_threshold = 64 * 1024  # bytes; larger payloads use AES-GCM envelopes
+        self.parallel_threshold = 256  # batch size at which bulk calls use the thread pool
+        self.max_crypto_workers = min(4, os.cpu_count() or 1)
+        self._crypto_pool = None
+        self._crypto_pool_lock = threading.Lock()
+        self.bcrypt_rounds = int(os.getenv('BCRYPT_ROUNDS', '12'))
+        self.max_hash_workers = 2
+        self._hash_pool = None
+        self._sanitizers = {name: _compile_sanitizer(allowed) for name, allowed in SANITIZE_PROFILES.items()}
     
     def hash_password(self, password):
-        """Hash a password using bcrypt"""
-        return bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+        """Hash a password using bcrypt at the configured cost"""
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.bcrypt_rounds))
+    
+    def verify_password(self, password, hashed, on_rehash=None):
+        """Verify a password against its hash
+        
+        If the password matches and the hash was made at a different cost,
+        the password is re-hashed at the current cost and passed to
+        ``on_rehash(new_hash)`` so the caller can store it.
+        """
+        if isinstance(hashed, str):
+            hashed = hashed.encode()
+        valid = bcrypt.checkpw(password.encode(), hashed)
+        if valid and on_rehash and self.needs_rehash(hashed):
+            try:
+                on_rehash(self.hash_password(password))
+            except Exception as e:
+                self.logger.error(f"Error re-hashing password: {e}")
+        return valid
+    
+    def hash_password_async(self, password):
+        """Hash a password on the bounded hashing pool; returns a Future
+        
+        In asyncio code, await ``asyncio.wrap_future(...)`` on the result.
+        """
+        return self._get_hash_pool().submit(self.hash_password, password)
+    
+    def verify_password_async(self, password, hashed, on_rehash=None):
+        """Verify (and maybe re-hash) a password on the hashing pool; returns a Future"""
+        return self._get_hash_pool().submit(self.verify_password, password, hashed, on_rehash)
+    
+    def needs_rehash(self, hashed):
+        """Whether a bcrypt hash was made at a cost other than bcrypt_rounds"""
+        if isinstance(hashed, str):
+            hashed = hashed.encode()
+        try:
+            return int(hashed.split(b"$")[2]) != self.bcrypt_rounds
+        except (IndexError, ValueError):
+            return True
+    
+    def calibrate_bcrypt_cost(self, target_seconds=0.25, min_rounds=10, max_rounds=16):
+        """Pick the highest bcrypt cost that hashes within target_seconds
+        
+        Times one hash at min_rounds and extrapolates, since each extra
+        round doubles the work. Sets and returns bcrypt_rounds.
+        """
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(min_rounds))
+        elapsed = time.perf_counter() - start
+        rounds = min_rounds
+        while rounds < max_rounds and elapsed * 2 <= target_seconds:
+            rounds += 1
+            elapsed *= 2
+        self.bcrypt_rounds = rounds
+        self.logger.info(f"bcrypt cost set to {rounds} (~{elapsed * 1000:.0f} ms per hash)")
+        return rounds
     
-    def verify_password(self, password, hashed):
-        """Verify a password against its hash"""
-        return bcrypt.checkpw(password.encode(), hashed)
+    def _get_hash_pool(self):
+        """Get the thread pool used for password hashing"""
+        with self._crypto_pool_lock:
+            if self._hash_pool is None:
+                self._hash_pool = ThreadPoolExecutor(max_workers=self.max_hash_workers,
+                                                     thread_name_prefix="bcrypt")
+            return self._hash_pool
     
-    def generate_token(self, user_id, ip_address):
-        """Generate a JWT token for authentication"""
+    def generate_token(self, user_id, ip_address, session_id=None):
+        """Generate a JWT token for authentication
+        
+        Tokens tied to a session (sid claim) stop verifying once the
+        session is terminated.
+        """
         try:
             payload = {
                 'user_id': user_id,
                 'ip': ip_address,
                 'exp': datetime.utcnow() + self.session_duration
             }
+            if session_id:
+                payload['sid'] = session_id
             return jwt.encode(payload, self.secret_key, algorithm='HS256')
         except Exception as e:
             self.logger.error(f"Error generating token: {e}")
             return None
     
     def verify_token(self, token, ip_address):
-        """Verify a JWT token"""
+        """Verify a JWT token
+        
+        Verified payloads are cached by token digest until they expire, so
+        repeat verifications skip the signature check and claim parsing.
+        The session is still looked up in the shared store every time, so
+        a session ended by another process stops its tokens at once.
+        """
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+            digest = self.token_cache.digest(token, self._token_namespace)
+            payload = self.token_cache.get(digest)
+            cached = payload is not None
+            if not cached:
+                payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+            if 'sid' in payload and not self.sessions.exists(payload['sid']):
+                self.token_cache.invalidate_session(payload['sid'])
+                raise jwt.InvalidTokenError("Session has ended")
+            if not cached:
+                self.token_cache.put(digest, payload)
             if payload['ip'] != ip_address:
                 raise jwt.InvalidTokenError("IP address mismatch")
-            return payload
+            return dict(payload)
         except jwt.ExpiredSignatureError:
             self.logger.warning("Token has expired")
             return None
         except jwt.InvalidTokenError as e:
             self.logger.warning(f"Invalid token: {e}")
+            self.log_security_event("token_rejected", {"ip": ip_address, "reason": str(e)})
             return None
     
-    def encrypt_data(self, data):
-        """Encrypt sensitive data"""
+    def encrypt_data(self, data, envelope=None):
+        """Encrypt sensitive data
+        
+        Payloads of envelope_threshold bytes or more (or any payload when
+        envelope=True) are sealed in an AES-GCM envelope instead of Fernet.
+        """
         try:
-            return self.fernet.encrypt(data.encode())
+            data = data.encode()
+            if envelope or (envelope is None and len(data) >= self.envelope_threshold):
+                return self._seal(data, *self._new_data_key())
+            return self.keystore.encrypt(data)
         except Exception as e:
             self.logger.error(f"Error encrypting data: {e}")
             return None
     
+    def encrypt_data_async(self, data, envelope=None):
+        """Encrypt data on the crypto pool; returns a Future of encrypt_data's result"""
+        return self.submit_crypto(self.encrypt_data, data, envelope)
+    
+    def submit_crypto(self, func, *args):
+        """Run other encryption work on the crypto pool; returns a Future"""
+        return self._get_crypto_pool().submit(func, *args)
+    
     def decrypt_data(self, encrypted_data):
-        """Decrypt sensitive data"""
+        """Decrypt sensitive data (Fernet tokens or AES-GCM envelopes)"""
         try:
-            return self.fernet.decrypt(encrypted_data).decode()
+            if isinstance(encrypted_data, str):
+                encrypted_data = encrypted_data.encode()
+            if encrypted_data.startswith(ENVELOPE_PREFIX):
+                return self._open(encrypted_data).decode()
+            return self.keystore.decrypt(encrypted_data).decode()
         except Exception as e:
             self.logger.error(f"Error decrypting data: {e}")
             return None
     
-    def check_login_attempt(self, ip_address):
-        """Check if login is allowed for this IP"""
-        if ip_address in self.blocked_ips:
-            return False
+    def encrypt_many(self, items, envelope=None):
+        """Encrypt a batch of strings, returning a list in the same order
         
-        attempts = self.login_attempts.get(ip_address, {'count': 0, 'last_attempt': None})
+        With envelope=True every item shares one AES-GCM data key that is
+        wrapped by the keystore once for the whole batch; otherwise large items
+        use envelopes as in encrypt_data. Items that fail come back as None.
+        """
+        items = list(items)
+        if envelope:
+            try:
+                data_key = self._new_data_key()
+            except Exception as e:
+                self.logger.error(f"Error creating data key: {e}")
+                return [None] * len(items)
+            
+            def encrypt(item):
+                return self._seal(item.encode(), *data_key)
+        else:
+            def encrypt(item):
+                data = item.encode()
+                if envelope is None and len(data) >= self.envelope_threshold:
+                    return self._seal(data, *self._new_data_key())
+                return self.keystore.encrypt(data)
         
-        # Reset attempts if last attempt was more than 1 hour ago
-        if attempts['last_attempt'] and \
-           datetime.now() - attempts['last_attempt'] > timedelta(hours=1):
-            attempts['count'] = 0
+        return self._map_batch(encrypt, items, "encrypting")
+    
+    def decrypt_many(self, items):
+        """Decrypt a batch of tokens, returning a list in the same order
         
-        return attempts['count'] < self.max_login_attempts
+        Envelope data keys are unwrapped once per batch. Items that fail
+        come back as None.
+        """
+        items = list(items)
+        data_keys = {}
+        
+        def decrypt(item):
+            if isinstance(item, str):
+                item = item.encode()
+            if item.startswith(ENVELOPE_PREFIX):
+                return self._open(item, data_keys).decode()
+            return self.keystore.decrypt(item).decode()
+        
+        return self._map_batch(decrypt, items, "decrypting")
+    
+    def _map_batch(self, func, items, action):
+        """Apply func to items, in slices on the crypto pool for large batches"""
+        def run(chunk):
+            results = []
+            for item in chunk:
+                try:
+                    results.append(func(item))
+                except Exception as e:
+                    self.logger.error(f"Error {action} data: {e}")
+                    results.append(None)
+            return results
+        
+        if len(items) < self.parallel_threshold or self.max_crypto_workers < 2:
+            return run(items)
+        # A few slices per worker keeps the pool busy without per-item overhead
+        size = -(-len(items) // (self.max_crypto_workers * 4))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        results = []
+        for chunk_results in self._get_crypto_pool().map(run, chunks):
+            results.extend(chunk_results)
+        return results
+    
+    def _get_crypto_pool(self):
+        """Get the thread pool used for large batches"""
+        with self._crypto_pool_lock:
+            if self._crypto_pool is None:
+                self._crypto_pool = ThreadPoolExecutor(max_workers=self.max_crypto_workers,
+                                                       thread_name_prefix="crypto")
+            return self._crypto_pool
+    
+    def _new_data_key(self):
+        """Create an AES-GCM data key and its keystore-wrapped form"""
+        key = aead.AESGCM.generate_key(bit_length=256)
+        return aead.AESGCM(key), base64.urlsafe_b64encode(self.keystore.encrypt(key))
+    
+    def _seal(self, data, cipher, wrapped_key):
+        """Build an envelope: prefix, wrapped data key, then nonce + ciphertext"""
+        nonce = os.urandom(12)
+        body = base64.urlsafe_b64encode(nonce + cipher.encrypt(nonce, data, wrapped_key))
+        return ENVELOPE_PREFIX + wrapped_key + b"." + body
+    
+    def _open(self, token, data_keys=None):
+        """Decrypt an envelope, reusing unwrapped keys from data_keys"""
+        wrapped_key, body = token[len(ENVELOPE_PREFIX):].split(b".", 1)
+        cipher = data_keys.get(wrapped_key) if data_keys is not None else None
+        if cipher is None:
+            cipher = aead.AESGCM(self.keystore.decrypt(base64.urlsafe_b64decode(wrapped_key)))
+            if data_keys is not None:
+                data_keys[wrapped_key] = cipher
+        raw = base64.urlsafe_b64decode(body)
+        return cipher.decrypt(raw[:12], raw[12:], wrapped_key)
+    
+    def rotate_keys(self):
+        """Make a new primary encryption key; returns its id
+        
+        Existing data stays readable with the old key until it is moved
+        over with start_reencryption and the old key is retired.
+        """
+        return self.keystore.rotate()
+    
+    def needs_reencryption(self, encrypted_data):
+        """Whether data was encrypted with a key other than the primary"""
+        if isinstance(encrypted_data, str):
+            encrypted_data = encrypted_data.encode()
+        if encrypted_data.startswith(ENVELOPE_PREFIX):
+            wrapped_key = encrypted_data[len(ENVELOPE_PREFIX):].split(b".", 1)[0]
+            encrypted_data = base64.urlsafe_b64decode(wrapped_key)
+        return self.keystore.needs_reencryption(encrypted_data)
+    
+    def start_reencryption(self, source, update, batch_size=500):
+        """Re-encrypt stored data under the primary key in the background
+        
+        ``source`` yields (ref, encrypted_data) pairs and ``update(ref,
+        new_data)`` stores each result. Returns the running ReencryptionJob.
+        """
+        return ReencryptionJob(self, source, update, batch_size).start()
+    
+    def derive_key(self, purpose):
+        """Derive a purpose-specific key (e.g. for blind indexes)
+        
+        Derived from the keystore's derivation secret rather than the
+        encryption key, so derived keys survive key rotation.
+        """
+        return hmac.new(self.keystore.derive_secret, purpose.encode(), hashlib.sha256).digest()
+    
+    def check_login_attempt(self, ip_address):
+        """Check if login is allowed for this IP
+        
+        An IP is blocked while it has max_login_attempts failures within
+        the sliding login_window.
+        """
+        failures = self.sessions.count_attempts(ip_address, self.login_window.total_seconds())
+        if failures >= self.max_login_attempts:
+            self.log_security_event("login_blocked", {"ip": ip_address, "failures": failures})
+            return False
+        return True
     
     def record_login_attempt(self, ip_address, success):
         """Record a login attempt"""
-        if ip_address not in self.login_attempts:
-            self.login_attempts[ip_address] = {'count': 0, 'last_attempt': None}
-        
-        if not success:
-            self.login_attempts[ip_address]['count'] += 1
-            if self.login_attempts[ip_address]['count'] >= self.max_login_attempts:
-                self.blocked_ips.add(ip_address)
+        if success:
+            self.sessions.clear_attempts(ip_address)
         else:
-            self.login_attempts[ip_address]['count'] = 0
-        
-        self.login_attempts[ip_address]['last_attempt'] = datetime.now()
+            self.sessions.record_attempt(ip_address)
+        self.audit_log.record("login_success" if success else "login_failure", ip=ip_address)
     
     def create_session(self, user_id, ip_address):
         """Create a new session"""
+        self._sweep_sessions()
         session_id = secrets.token_hex(16)
-        self.active_sessions[session_id] = {
+        now = time.time()
+        self.sessions.create(session_id, {
             'user_id': user_id,
             'ip_address': ip_address,
-            'created_at': datetime.now(),
-            'last_activity': datetime.now()
-        }
+            'created_at': now,
+            'last_activity': now,
+            'expires_at': now + self.session_duration.total_seconds()
+        })
+        self.audit_log.record("session_created", ip=ip_address, user=user_id, session_id=session_id)
         return session_id
     
+    def get_session(self, session_id):
+        """Get a session with datetime timestamps, or None"""
+        session = self.sessions.get(session_id)
+        if session:
+            for field in ('created_at', 'last_activity', 'expires_at'):
+                session[field] = datetime.fromtimestamp(session[field])
+        return session
+    
     def validate_session(self, session_id, ip_address):
         """Validate a session"""
-        session = self.active_sessions.get(session_id)
+        self._sweep_sessions()
+        session = self.sessions.get(session_id)
         if not session:
             return False
         
         if session['ip_address'] != ip_address:
+            self.log_security_event("session_ip_mismatch", {
+                "ip": ip_address, "user": session['user_id'], "session_ip": session['ip_address']
+            })
             self.terminate_session(session_id)
             return False
         
-        if datetime.now() - session['created_at'] > self.session_duration:
+        now = time.time()
+        if now >= session['expires_at']:
             self.terminate_session(session_id)
             return False
         
-        session['last_activity'] = datetime.now()
+        self.sessions.touch(session_id, now)
         return True
     
     def terminate_session(self, session_id):
-        """Terminate a session"""
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
+        """Terminate a session and forget its cached tokens"""
+        if self.sessions.delete(session_id):
+            self.audit_log.record("session_terminated", session_id=session_id)
+        self.token_cache.invalidate_session(session_id)
+    
+    def _sweep_sessions(self):
+        """Drop expired sessions and stale login attempts at most once per sweep_interval"""
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            try:
+                self.sessions.sweep(attempt_window=self.login_window.total_seconds())
+            except Exception as e:
+                self.logger.error(f"Error sweeping sessions: {e}")
     
-    def sanitize_input(self, input_str):
-        """Sanitize user input"""
+    def sanitize_input(self, input_str, context="default"):
+        """Sanitize user input
+        
+        Keeps letters, digits and the context's allowlisted characters
+        (see SANITIZE_PROFILES), then strips surrounding whitespace.
+        """
         # Remove potentially dangerous characters
-        sanitized = ''.join(char for char in input_str 
-                          if char.isalnum() or char in ' .,!?-_@#$%^&*()[]{}')
-        return sanitized.strip()
+        return _sanitize(input_str, self._sanitizers[context])
+    
+    def sanitize_many(self, inputs, context="default"):
+        """Sanitize a batch of inputs with the same context"""
+        sanitizer = self._sanitizers[context]
+        return [_sanitize(input_str, sanitizer) for input_str in inputs]
+    
+    def add_sanitize_profile(self, context, allowed):
+        """Register an allowlist of extra characters for a context"""
+        self._sanitizers[context] = _compile_sanitizer(allowed)
     
     def validate_api_key(self, api_key):
         """Validate an API key"""
@@ -147,5 +467,28 @@ class SecurityManager:
         return False  # Placeholder
     
     def log_security_event(self, event_type, details):
-        """Log security-related events"""
-        self.logger.warning(f"Security event: {event_type} - {details}")
\ No newline at end of file
+        """Log security-related events to the audit log
+        
+        ``details`` may be a message or a dict; its "ip"/"ip_address" and
+        "user"/"user_id" entries become the event's queryable fields.
+        """
+        self.logger.warning(f"Security event: {event_type} - {details}")
+        if not isinstance(details, dict):
+            details = {"message": details}
+        details = dict(details)
+        ip = details.pop("ip", None) or details.pop("ip_address", None)
+        user = details.pop("user", None) or details.pop("user_id", None)
+        self.audit_log.record(event_type, ip=ip, user=user, **details)
+
+
+_security_manager = None
+_security_manager_lock = threading.Lock()
+
+
+def get_security_manager():
+    """Get the SecurityManager shared by the assistant's components"""
+    global _security_manager
+    with _security_manager_lock:
+        if _security_manager is None:
+            _security_manager = SecurityManager()
+        return _security_manager
@@ -0,0 +1,233 @@
+"""
+Session store module
+Shared session and login-attempt storage for SecurityManager
+"""
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class MemorySessionStore:
+    """Memory Session Store shared by SecurityManagers in one process
+
+    Session expiry times sit in a heap so a sweep pops only expired
+    sessions, oldest first. Failed logins are kept per key as a deque of
+    timestamps, trimmed to the sliding window on each count.
+    """
+    def __init__(self):
+        self._sessions = {}  # session id -> session dict
+        self._expiry = []  # (expires_at, session id)
+        self._attempts = {}  # key -> deque of attempt times
+        self._lock = threading.Lock()
+
+    def create(self, session_id, session):
+        """Store a session; ``session["expires_at"]`` is an epoch time"""
+        with self._lock:
+            self._sessions[session_id] = dict(session)
+            heapq.heappush(self._expiry, (session["expires_at"], session_id))
+
+    def get(self, session_id):
+        """Get a copy of a session, or None"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return dict(session) if session else None
+
+    def exists(self, session_id):
+        """Whether a session is stored"""
+        with self._lock:
+            return session_id in self._sessions
+
+    def touch(self, session_id, last_activity):
+        """Record session activity"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session:
+                session["last_activity"] = last_activity
+
+    def delete(self, session_id):
+        """Delete a session (its heap entry is skipped lazily)"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def sweep(self, now=None, attempt_window=None):
+        """Delete every expired session, and login attempts older than
+        ``attempt_window`` seconds when given; returns how many sessions
+        were removed"""
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires_at, session_id = heapq.heappop(self._expiry)
+                session = self._sessions.get(session_id)
+                if session and session["expires_at"] == expires_at:
+                    del self._sessions[session_id]
+                    removed += 1
+            if attempt_window is not None:
+                since = now - attempt_window
+                for key in [k for k, attempts in self._attempts.items() if attempts[-1] <= since]:
+                    del self._attempts[key]
+        return removed
+
+    def count(self):
+        """Number of stored sessions"""
+        with self._lock:
+            return len(self._sessions)
+
+    def record_attempt(self, key, at=None):
+        """Record a failed login for a key"""
+        with self._lock:
+            self._attempts.setdefault(key, deque()).append(time.time() if at is None else at)
+
+    def count_attempts(self, key, window, now=None):
+        """Count failed logins for a key in the last ``window`` seconds"""
+        since = (time.time() if now is None else now) - window
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return 0
+            while attempts and attempts[0] <= since:
+                attempts.popleft()
+            if not attempts:
+                del self._attempts[key]
+                return 0
+            return len(attempts)
+
+    def clear_attempts(self, key):
+        """Forget the failed logins for a key"""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class SQLiteSessionStore:
+    """SQLite Session Store shared by every process using the same file
+
+    Sessions are indexed by expiry time, so a sweep is a single range
+    delete. Each failed login is a row, and the sliding-window count is
+    a range count over (key, attempted_at). WAL mode lets readers run
+    alongside a writer.
+    """
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    ip_address TEXT,
+                    created_at REAL NOT NULL,
+                    last_activity REAL NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+                CREATE TABLE IF NOT EXISTS login_attempts (
+                    key TEXT NOT NULL,
+                    attempted_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS login_attempts_key ON login_attempts (key, attempted_at);
+            """)
+
+    def create(self, session_id, session):
+        """Store a session; ``session["expires_at"]`` is an epoch time"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, session["user_id"], session["ip_address"], session["created_at"],
+                 session["last_activity"], session["expires_at"])
+            )
+
+    def get(self, session_id):
+        """Get a session, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, ip_address, created_at, last_activity, expires_at "
+                "FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("user_id", "ip_address", "created_at", "last_activity", "expires_at"), row))
+
+    def exists(self, session_id):
+        """Whether a session is stored (a primary key lookup)"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def touch(self, session_id, last_activity):
+        """Record session activity"""
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET last_activity = ? WHERE id = ?",
+                               (last_activity, session_id))
+
+    def delete(self, session_id):
+        """Delete a session"""
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def sweep(self, now=None, attempt_window=None):
+        """Delete every expired session, and login attempts older than
+        ``attempt_window`` seconds when given; returns how many sessions
+        were removed"""
+        now = time.time() if now is None else now
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+            if attempt_window is not None:
+                self._conn.execute("DELETE FROM login_attempts WHERE attempted_at <= ?", (now - attempt_window,))
+        return removed
+
+    def count(self):
+        """Number of stored sessions"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def record_attempt(self, key, at=None):
+        """Record a failed login for a key"""
+        with self._lock:
+            self._conn.execute("INSERT INTO login_attempts VALUES (?, ?)",
+                               (key, time.time() if at is None else at))
+
+    def count_attempts(self, key, window, now=None):
+        """Count failed logins for a key in the last ``window`` seconds"""
+        since = (time.time() if now is None else now) - window
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM login_attempts WHERE key = ? AND attempted_at > ?", (key, since)
+            ).fetchone()[0]
+
+    def clear_attempts(self, key):
+        """Forget the failed logins for a key"""
+        with self._lock:
+            self._conn.execute("DELETE FROM login_attempts WHERE key = ?", (key,))
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Get the shared session store
+
+    SESSION_STORE=memory keeps sessions in this process only; otherwise
+    they go to the SQLite file at SESSION_DB (default
+    data/security/sessions.db) so every process sees them.
+    """
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            if os.getenv("SESSION_STORE", "sqlite") == "memory":
+                _session_store = MemorySessionStore()
+            else:
+                _session_store = SQLiteSessionStore(os.getenv("SESSION_DB", "data/security/sessions.db"))
+        return _session_store
@@ -2,9 +2,11 @@
 Shopping module for online purchases and product search
 """
 import json
-import requests
 from datetime import datetime
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
 
 class ShoppingAssistant:
     """Shopping Assistant for online purchases and product search"""
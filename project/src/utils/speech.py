@@ -2,30 +2,217 @@
 Speech utility module
 Provides text-to-speech functionality for the application
 """
-import pyttsx3
+import threading
+import time
+from collections import deque
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
 
-class SpeechManager:
-    """Speech Manager class for text-to-speech functionality"""
-    def __init__(self):
+pyttsx3 = lazy_import("pyttsx3")
+
+SPEECH_OVERFLOW_POLICIES = ("drop", "merge")
+
+class SpeechQueue:
+    """Speech Queue speaking utterances on a dedicated worker thread
+
+    ``say`` only queues the text, so callers (the CLI prompt) never wait
+    for speech to finish. The TTS engine is created and driven on the
+    worker thread, as pyttsx3 drivers expect; settings changes go through
+    ``configure`` so they run there too.
+
+    At most ``max_pending`` utterances wait. When the queue is full the
+    ``overflow`` policy either drops the oldest one ("drop") or appends
+    the text to the newest one ("merge"); once a merged utterance would
+    exceed ``max_merged`` characters the oldest is dropped instead, so
+    merging never grows an utterance without bound. Utterances that waited longer
+    than ``max_age`` seconds are skipped as stale. With ``interrupt`` set,
+    new text stops the current utterance and replaces everything pending.
+    """
+    def __init__(self, engine_factory=None, max_pending=5, overflow="drop", interrupt=False, max_age=None,
+                 max_merged=1000):
+        if overflow not in SPEECH_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be at least 1: {max_pending}")
+        if max_merged < 1:
+            raise ValueError(f"max_merged must be at least 1: {max_merged}")
         self.logger = get_logger()
-        self.engine = pyttsx3.init()
-        # Set default properties
-        self.engine.setProperty('rate', 150)    # Speaking rate
-        self.engine.setProperty('volume', 0.9)  # Volume (0-1)
-    
-    def speak(self, text):
-        """Speak the given text"""
+        self.engine_factory = engine_factory
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.interrupt_on_new = interrupt
+        self.max_age = max_age
+        self.max_merged = max_merged
+        self.stats = {"spoken": 0, "dropped": 0, "merged": 0, "interrupted": 0, "failed": 0}
+        self._pending = deque()  # (text, queued_at)
+        self._commands = []
+        self._cond = threading.Condition()
+        self._interrupted = threading.Event()
+        self._speaking = False
+        self._running = False
+        self._broken = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        """Number of utterances waiting to be spoken"""
+        return len(self._pending)
+
+    @property
+    def speaking(self):
+        """Whether an utterance is being spoken right now"""
+        return self._speaking
+
+    def say(self, text, interrupt=None):
+        """Queue text to be spoken; returns False if speech is unavailable"""
+        if self._broken or not text:
+            return False
+        interrupt = self.interrupt_on_new if interrupt is None else interrupt
+        with self._cond:
+            if interrupt:
+                self._interrupt_locked()
+            elif len(self._pending) >= self.max_pending:
+                merged = f"{self._pending[-1][0]} {text}"
+                if self.overflow == "merge" and len(merged) <= self.max_merged:
+                    self._pending[-1] = (merged, time.monotonic())
+                    self.stats["merged"] += 1
+                    self._cond.notify_all()
+                    return True
+                self._pending.popleft()
+                self.stats["dropped"] += 1
+            self._pending.append((text, time.monotonic()))
+            self._cond.notify_all()
+        self.start()
+        return True
+
+    def configure(self, command):
+        """Run ``command(engine)`` on the worker before the next utterance"""
+        with self._cond:
+            self._commands.append(command)
+            self._cond.notify_all()
+        self.start()
+
+    def interrupt(self):
+        """Stop the current utterance and drop everything pending"""
+        with self._cond:
+            self._interrupt_locked()
+
+    def wait(self, timeout=None):
+        """Block until everything queued has been spoken; returns whether it was"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._broken or not (self._pending or self._commands or self._speaking), timeout)
+
+    def start(self):
+        """Start the worker thread"""
+        with self._cond:
+            if self._running or self._broken:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop speaking and shut the worker down"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._interrupt_locked()
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _interrupt_locked(self):
+        """Drop pending utterances and flag the current one to stop (lock held)"""
+        self.stats["dropped"] += len(self._pending)
+        self._pending.clear()
+        if self._speaking:
+            self._interrupted.set()
+            self.stats["interrupted"] += 1
+
+    def _run(self):
+        """Worker loop: own the engine and speak queued text in order"""
         try:
-            self.engine.say(text)
-            self.engine.runAndWait()
+            engine = self.engine_factory() if self.engine_factory else pyttsx3.init()
         except Exception as e:
-            self.logger.error(f"Error in speech synthesis: {e}")
-    
+            self.logger.error(f"Error starting speech engine: {e}")
+            with self._cond:
+                self._broken = True
+                self._running = False
+                self._pending.clear()
+                self._commands = []
+                self._cond.notify_all()
+            return
+        try:
+            # pyttsx3 only honours stop() from inside its own callbacks
+            engine.connect("started-word", lambda *args, **kwargs: self._check_interrupt(engine))
+        except Exception:
+            pass
+
+        while True:
+            with self._cond:
+                self._speaking = False
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: not self._running or self._pending or self._commands)
+                if not self._running:
+                    return
+                commands, self._commands = self._commands, []
+                item = self._pending.popleft() if self._pending else None
+                self._interrupted.clear()
+                self._speaking = item is not None
+
+            for command in commands:
+                try:
+                    command(engine)
+                except Exception as e:
+                    self.logger.error(f"Error configuring speech engine: {e}")
+            if item is None:
+                continue
+
+            text, queued_at = item
+            if self.max_age is not None and time.monotonic() - queued_at > self.max_age:
+                self.stats["dropped"] += 1
+                continue
+            try:
+                engine.say(text)
+                engine.runAndWait()
+                self.stats["spoken"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                self.logger.error(f"Error in speech synthesis: {e}")
+
+    def _check_interrupt(self, engine):
+        """Engine callback: stop the utterance if it was interrupted"""
+        if self._interrupted.is_set():
+            engine.stop()
+
+
+class SpeechManager:
+    """Speech Manager class for text-to-speech functionality
+
+    Speech is queued on a SpeechQueue, so ``speak`` returns immediately.
+    """
+    def __init__(self, max_pending=5, overflow="drop", interrupt=False):
+        self.logger = get_logger()
+        self.queue = SpeechQueue(max_pending=max_pending, overflow=overflow, interrupt=interrupt)
+        # Set default properties
+        self.set_rate(150)      # Speaking rate
+        self.set_volume(0.9)    # Volume (0-1)
+
+    def speak(self, text, interrupt=None):
+        """Queue the given text to be spoken"""
+        return self.queue.say(text, interrupt=interrupt)
+
+    def stop_speaking(self):
+        """Stop the current utterance and drop anything queued"""
+        self.queue.interrupt()
+
     def set_rate(self, rate):
         """Set the speaking rate (words per minute)"""
-        self.engine.setProperty('rate', rate)
-    
+        self.queue.configure(lambda engine: engine.setProperty('rate', rate))
+
     def set_volume(self, volume):
         """Set the volume (0-1)"""
-        self.engine.setProperty('volume', max(0, min(1, volume)))
\ No newline at end of file
+        volume = max(0, min(1, volume))
+        self.queue.configure(lambda engine: engine.setProperty('volume', volume))
@@ -0,0 +1,108 @@
+"""
+Token cache module
+Bounded cache of verified JWT payloads
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """Verified Token Cache mapping token digests to decoded payloads
+
+    Only tokens that passed signature and claim checks are cached, keyed by
+    their SHA-256 digest so raw tokens aren't kept. An entry lives until
+    the token's ``exp`` (capped at ``ttl`` seconds) and the least recently
+    used entry is evicted once ``max_size`` is reached. Entries carrying a
+    ``sid`` claim are indexed by it so ending a session drops its tokens.
+    The index only covers this process, so callers still check the shared
+    session store on a hit.
+    """
+    def __init__(self, max_size=10000, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()  # digest -> (payload, expires_at)
+        self._by_session = {}  # sid -> set of digests
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token, namespace=b""):
+        """Cache key for a token (namespace separates signing secrets)"""
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(namespace + b"." + token).digest()
+
+    def get(self, digest, now=None):
+        """Get a cached payload, or None if missing or expired"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if now >= entry[1]:
+                self._remove(digest)
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, digest, payload, now=None):
+        """Cache a verified payload until its exp (or the cache TTL)"""
+        if self.max_size <= 0:
+            return
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        with self._lock:
+            if digest in self._entries:
+                self._remove(digest)
+            while len(self._entries) >= self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            self._entries[digest] = (payload, expires_at)
+            sid = payload.get("sid")
+            if sid is not None:
+                self._by_session.setdefault(sid, set()).add(digest)
+
+    def invalidate_session(self, sid):
+        """Drop every cached token of a session"""
+        with self._lock:
+            for digest in self._by_session.pop(sid, ()):
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._by_session.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, digest):
+        """Remove an entry and its session index (lock held)"""
+        payload, _ = self._entries.pop(digest)
+        sid = payload.get("sid")
+        digests = self._by_session.get(sid)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_session[sid]
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Get the token cache shared by SecurityManagers in this process"""
+    global _token_cache
+    with _token_cache_lock:
+        if _token_cache is None:
+            _token_cache = VerifiedTokenCache()
+        return _token_cache
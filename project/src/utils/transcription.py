@@ -2,8 +2,10 @@
 Transcription utility module
 Provides speech-to-text functionality for the application
 """
-import speech_recognition as sr
 from src.utils.logger import get_logger
+from src.utils.lazy import lazy_import
+
+sr = lazy_import("speech_recognition")
 
 class TranscriptionManager:
     """Transcription Manager class for speech-to-text functionality"""
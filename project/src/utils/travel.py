@@ -1,16 +1,18 @@
 """
 Travel management module for handling travel arrangements and itineraries
 """
-import requests
 from datetime import datetime, timedelta
 from src.utils.logger import get_logger
-from src.utils.security import SecurityManager
+from src.utils.security import get_security_manager
+from src.utils.lazy import lazy_import
+
+requests = lazy_import("requests")
 
 class TravelManager:
     """Travel Manager for handling travel arrangements"""
     def __init__(self):
         self.logger = get_logger()
-        self.security = SecurityManager()
+        self.security = get_security_manager()
         self.api_keys = {
             "amadeus": None,
             "google_maps": None,
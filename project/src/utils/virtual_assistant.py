@@ -1,30 +1,34 @@
 """
 Virtual Assistant module with enhanced security and chat capabilities
 """
-import os
 from datetime import datetime, timedelta
-import pyttsx3
-import random
+from functools import cached_property
 from src.utils.logger import get_logger
-from src.utils.ai_assistant import AIAssistant
+from src.utils.ai_assistant import get_ai_assistant
 from src.utils.languages import LanguageManager
 from src.utils.shopping import ShoppingAssistant
 from src.utils.search import SearchAssistant
 from src.utils.analytics import AnalyticsManager
 from src.utils.smart_scheduler import SmartScheduler
-from src.utils.security import SecurityManager
+from src.utils.security import get_security_manager
 from src.utils.chat import ChatManager
+from src.utils.secretary import SecretaryAssistant
+from src.utils.speech import SpeechQueue
+from src.utils.proactive import ProactiveRefresher
+from src.utils.conversation_memory import ConversationMemory
 
 class VirtualAssistant:
-    """Virtual Assistant with executive-level capabilities and chat"""
+    """Virtual Assistant with executive-level capabilities and chat
+
+    Subsystems (voice, secretary, chat, search, ...) are built on first
+    use, so starting the assistant doesn't pay for the ones a session
+    never touches.
+    """
     def __init__(self):
         self.logger = get_logger()
         self.name = "Luna"
-        self.security = SecurityManager()
         self.current_session = None
         self.current_user = None
-        self.secretary = SecretaryAssistant()
-        self.chat_manager = ChatManager()
         
         self.personality = {
             "tone": "executive and professional",
@@ -48,21 +52,86 @@ class VirtualAssistant:
             "response_length": "concise",
             "use_emojis": True,
             "conversation_memory": True,
-            "proactive_suggestions": True
+            "proactive_suggestions": True,
+            "interrupt_speech": True
         }
         self.avatar_url = "https://images.pexels.com/photos/7242908/pexels-photo-7242908.jpeg"
-        self.ai = AIAssistant()
-        self.voice = pyttsx3.init()
-        self.language_manager = LanguageManager()
-        self.shopping_assistant = ShoppingAssistant()
-        self.search_assistant = SearchAssistant()
-        self.analytics = AnalyticsManager()
-        self.scheduler = SmartScheduler()
-        self.conversation_history = []
-        self.configure_voice()
-        self.last_proactive_check = datetime.now()
+        self.history_limits = {
+            "page_size": 50,
+            "max_pages": 4,
+            "tail_size": 20
+        }
         self.proactive_interval = timedelta(minutes=30)
 
+    @cached_property
+    def security(self):
+        """Shared security manager"""
+        return get_security_manager()
+
+    @cached_property
+    def ai(self):
+        """Shared AI assistant"""
+        return get_ai_assistant()
+
+    @cached_property
+    def voice(self):
+        """Speech queue; the text-to-speech engine lives on its worker thread"""
+        voice = SpeechQueue(max_pending=3, overflow="merge",
+                            interrupt=self.interaction_style["interrupt_speech"], max_age=30)
+        voice.configure(self._configure_engine)
+        return voice
+
+    @cached_property
+    def conversation_history(self):
+        """Encrypted conversation memory, bounded by history_limits"""
+        return ConversationMemory(self.security, **self.history_limits)
+
+    @cached_property
+    def proactive(self):
+        """Background refresher for proactive suggestions"""
+        refresher = ProactiveRefresher([
+            ("market_trends", self._suggest_market_trends),
+            ("price_alerts", self._suggest_price_alerts),
+            ("schedule", self._suggest_schedule)
+        ], interval=self.proactive_interval.total_seconds())
+        refresher.start()
+        return refresher
+
+    @cached_property
+    def secretary(self):
+        """Secretary assistant"""
+        return SecretaryAssistant()
+
+    @cached_property
+    def chat_manager(self):
+        """Chat manager"""
+        return ChatManager()
+
+    @cached_property
+    def language_manager(self):
+        """Language manager"""
+        return LanguageManager()
+
+    @cached_property
+    def shopping_assistant(self):
+        """Shopping assistant"""
+        return ShoppingAssistant()
+
+    @cached_property
+    def search_assistant(self):
+        """Search assistant"""
+        return SearchAssistant()
+
+    @cached_property
+    def analytics(self):
+        """Analytics manager"""
+        return AnalyticsManager()
+
+    @cached_property
+    def scheduler(self):
+        """Smart scheduler"""
+        return SmartScheduler()
+
     def authenticate_user(self, username, password, ip_address):
         """Authenticate a user"""
         if not self.security.check_login_attempt(ip_address):
@@ -126,16 +195,10 @@ class VirtualAssistant:
                 modified_text = f"{modified_text}\n\nProactively, I suggest:\n" + "\n".join(proactive_suggestions)
 
             self.voice.say(modified_text)
-            self.voice.runAndWait()
             
-            # Securely store in conversation history
+            # Securely store in conversation history (encrypted off this thread)
             if self.interaction_style["conversation_memory"]:
-                encrypted_text = self.security.encrypt_data(modified_text)
-                self.conversation_history.append({
-                    "type": "assistant",
-                    "text": encrypted_text,
-                    "timestamp": datetime.now()
-                })
+                self.conversation_history.append("assistant", modified_text)
         except Exception as e:
             self.logger.error(f"Error in speech synthesis: {e}")
 
@@ -144,21 +207,7 @@ class VirtualAssistant:
         if not self.current_session:
             return []
 
-        history = self.conversation_history[-limit:] if limit else self.conversation_history
-        decrypted_history = []
-        
-        for entry in history:
-            try:
-                decrypted_text = self.security.decrypt_data(entry["text"])
-                decrypted_history.append({
-                    "type": entry["type"],
-                    "text": decrypted_text,
-                    "timestamp": entry["timestamp"]
-                })
-            except Exception as e:
-                self.logger.error(f"Error decrypting history entry: {e}")
-
-        return decrypted_history
+        return self.conversation_history.recent(limit)
 
     def logout(self):
         """Log out the current user"""
@@ -166,48 +215,67 @@ class VirtualAssistant:
             self.security.terminate_session(self.current_session)
             self.current_session = None
             self.current_user = None
+            self._stop_proactive()
             return True
         return False
 
+    def shutdown(self):
+        """Stop the background workers before exiting"""
+        self._stop_proactive()
+        if "voice" in self.__dict__:
+            self.voice.stop()
+
+    def _stop_proactive(self):
+        """Stop the proactive refresher; it starts again on next use"""
+        refresher = self.__dict__.pop("proactive", None)
+        if refresher is not None:
+            refresher.stop()
+
     def configure_voice(self):
-        """Configure text-to-speech settings"""
+        """Configure text-to-speech settings (applied on the speech thread)"""
+        self.voice.configure(self._configure_engine)
+
+    def _configure_engine(self, engine):
+        """Apply personality voice settings to the TTS engine"""
         try:
-            self.voice.setProperty('rate', self.personality['speaking_rate'])
-            voices = self.voice.getProperty('voices')
+            engine.setProperty('rate', self.personality['speaking_rate'])
+            voices = engine.getProperty('voices')
             # Select voice based on current language and gender preference
             for voice in voices:
                 if self.personality['language'] in voice.id.lower() and self.personality['voice_gender'] in voice.name.lower():
-                    self.voice.setProperty('voice', voice.id)
+                    engine.setProperty('voice', voice.id)
                     break
             # Set additional voice properties for executive presence
-            self.voice.setProperty('volume', 0.9)  # Confident volume
+            engine.setProperty('volume', 0.9)  # Confident volume
         except Exception as e:
             self.logger.error(f"Error configuring voice: {e}")
 
     def check_proactive_actions(self):
-        """Check and suggest proactive actions"""
-        if datetime.now() - self.last_proactive_check < self.proactive_interval:
-            return None
+        """Get proactive suggestions not offered yet, or None
 
-        self.last_proactive_check = datetime.now()
-        suggestions = []
+        Suggestions are refreshed in the background every
+        proactive_interval; this only reads the cached results.
+        """
+        return self.proactive.take()
 
-        # Market trends analysis
+    def _suggest_market_trends(self):
+        """Market trends analysis"""
         market_trends = self.search_assistant.news_search("market trends", days=1)
         if market_trends:
-            suggestions.append(f"I've noticed some important market trends: {market_trends[0]['title']}")
-
-        # Price monitoring
-        price_alerts = self.shopping_assistant.check_price_alerts()
-        if price_alerts:
-            suggestions.append("There are favorable price movements in your watched items.")
+            return f"I've noticed some important market trends: {market_trends[0]['title']}"
+        return None
 
-        # Schedule optimization
-        schedule_suggestions = self.scheduler.suggest_schedule([], [])
-        if schedule_suggestions:
-            suggestions.append("I can help optimize your schedule for better productivity.")
+    def _suggest_price_alerts(self):
+        """Price monitoring"""
+        if self.shopping_assistant.check_price_alerts():
+            return "There are favorable price movements in your watched items."
+        return None
 
-        return suggestions if suggestions else None
+    def _suggest_schedule(self):
+        """Schedule optimization"""
+        if self.scheduler.suggest_schedule([], []):
+            return "I can help optimize your schedule for better productivity."
+        return None
 
     def make_executive_suggestion(self, context):
         """Generate executive-level suggestions"""
@@ -233,31 +301,12 @@ class VirtualAssistant:
             return None
 
     def _apply_personality_to_text(self, text):
-        """Modify text to reflect executive presence"""
-        modified_text = text
-
-        # Add executive-style phrases
-        executive_phrases = {
-            "suggest": "recommend",
-            "think": "analyze",
-            "look at": "evaluate",
-            "try": "implement",
-            "problem": "challenge",
-            "idea": "strategy"
-        }
-        
-        for original, replacement in executive_phrases.items():
-            modified_text = modified_text.replace(original, replacement)
+        """Modify text to reflect executive presence
 
-        # Add data-driven insights
-        if "recommend" in modified_text.lower():
-            modified_text += "\n\nThis recommendation is based on current market analysis and trending data."
-
-        # Add strategic context
-        if "strategy" in modified_text.lower():
-            modified_text += "\n\nThis aligns with long-term objectives and market positioning."
-
-        return modified_text
+        Uses the current language's phrase table (see LanguageManager),
+        compiled once and applied in a single pass.
+        """
+        return self.language_manager.get_rewriter().apply(text)
 
     def _analyze_budget_decision(self, context):
         """Analyze and make budget-related decisions"""
@@ -384,6 +433,11 @@ class VirtualAssistant:
         """Get users currently typing in chat"""
         return self.chat_manager.get_typing_status(conversation_id)
     
+    def subscribe_chat_updates(self, callback, conversation_id=None):
+        """Get typing, read-receipt and presence changes pushed to a callback"""
+        return self.chat_manager.subscribe(callback, conversation_id)
+    
     def export_chat(self, conversation_id, format="json"):
         """Export chat conversation"""
-        return self.chat_manager.export_conversation(conversation_id, format)
\ No newline at end of file
+        return self.chat_manager.export_conversation(conversation_id, format)
+
@@ -0,0 +1,259 @@
+"""
+Workflow executor module
+Runs workflow steps as a dependency graph on thread and process pools
+"""
+import heapq
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from src.utils.logger import get_logger
+
+
+def run_step_action(action, params, inputs):
+    """Invoke a step action (module level so process pools can pickle it)"""
+    if action is None:
+        return None
+    return action(params, inputs)
+
+
+class WorkflowExecutor:
+    """Workflow Executor for running dependent steps concurrently
+
+    Each step is a dict with the following optional keys:
+        name        unique step name (defaults to "step_<n>")
+        action      callable ``action(params, inputs)``; ``inputs`` maps each
+                    dependency name to its result. Other values are passed to
+                    ``action_resolver``. A bare (non-dict) step that can't be
+                    resolved is only a description and succeeds as a no-op
+        depends_on  list of step names; when omitted the step depends on the
+                    step declared before it, which keeps plain step lists
+                    sequential
+        executor    "thread" (I/O bound, default) or "process" (CPU bound,
+                    action must be picklable)
+        timeout     seconds allowed per attempt. Python can't stop a running
+                    thread or pool worker, so a timed-out attempt is abandoned
+                    rather than killed; its retry waits until it has finished,
+                    so a hung step never holds more than one worker
+        retries     extra attempts after a failure (default 0)
+        backoff     base delay in seconds, doubled after every failed attempt
+    """
+    def __init__(self, max_threads=8, max_processes=None, action_resolver=None):
+        self.logger = get_logger()
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.action_resolver = action_resolver
+        self._thread_pool = None
+        self._process_pool = None
+
+    def run(self, steps, params=None, completed=None, on_step_complete=None):
+        """Run the steps and return a dict of step name -> result record
+
+        ``completed`` maps step names to results from an earlier run; those
+        steps are not executed again and their results are passed on to
+        dependents. ``on_step_complete(name, record)`` is called once per
+        finished step.
+        """
+        graph = self._build_graph(steps)
+        completed = dict(completed or {})
+        records = {}
+        remaining = {}
+        dependents = {name: [] for name in graph}
+
+        for name, step in graph.items():
+            for dep in step["depends_on"]:
+                dependents[dep].append(name)
+            remaining[name] = len([d for d in step["depends_on"] if d not in completed])
+
+        ready = []  # heap of (ready_at, order, name, attempt)
+        for order, name in enumerate(graph):
+            if name in completed:
+                records[name] = {"step": name, "success": True, "result": completed[name], "skipped": True}
+            elif remaining[name] == 0:
+                ready.append((0, order, name, 1))
+        heapq.heapify(ready)
+        order_of = {name: order for order, name in enumerate(graph)}
+
+        results = {name: completed[name] for name in completed if name in graph}
+        running = {}
+        abandoned = {}  # timed-out future still running -> the retry waiting on it
+        failed = False
+
+        while ready or running or abandoned:
+            now = time.monotonic()
+            while ready and ready[0][0] <= now and not failed:
+                _, _, name, attempt = heapq.heappop(ready)
+                step = graph[name]
+                inputs = {dep: results[dep] for dep in step["depends_on"]}
+                future = self._submit(step, params, inputs)
+                started = time.monotonic()
+                deadline = started + step["timeout"] if step["timeout"] else None
+                running[future] = (name, attempt, started, deadline, datetime.now())
+
+            if not running and not abandoned:
+                if failed or not ready:
+                    break
+                time.sleep(max(0, ready[0][0] - time.monotonic()))
+                continue
+
+            wait_for = self._next_wakeup(running, ready, failed)
+            done, _ = wait(list(running) + list(abandoned), timeout=wait_for, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+
+            for future in done:
+                if future in abandoned:
+                    ready_at, order, name, attempt = abandoned.pop(future)
+                    heapq.heappush(ready, (max(ready_at, now), order, name, attempt))
+
+            finished = [(f, False) for f in done if f in running]
+            finished += [(f, True) for f, info in running.items()
+                         if f not in done and info[3] is not None and now >= info[3]]
+
+            for future, timed_out in finished:
+                name, attempt, started, _, started_at = running.pop(future)
+                step = graph[name]
+                record = {
+                    "step": name,
+                    "attempts": attempt,
+                    "started_at": started_at,
+                    "finished_at": datetime.now(),
+                    "duration": now - started
+                }
+                still_running = timed_out and not future.cancel()
+                if timed_out:
+                    record.update(success=False, error=f"Timed out after {step['timeout']}s")
+                else:
+                    try:
+                        record.update(success=True, result=future.result())
+                    except Exception as e:
+                        record.update(success=False, error=str(e))
+
+                if not record["success"] and attempt <= step["retries"]:
+                    delay = step["backoff"] * (2 ** (attempt - 1))
+                    self.logger.warning(f"Step '{name}' failed (attempt {attempt}), retrying in {delay:.2f}s")
+                    retry = (now + delay, order_of[name], name, attempt + 1)
+                    if still_running:
+                        abandoned[future] = retry
+                    else:
+                        heapq.heappush(ready, retry)
+                    continue
+
+                records[name] = record
+                if on_step_complete:
+                    on_step_complete(name, record)
+
+                if record["success"]:
+                    results[name] = record["result"]
+                    for child in dependents[name]:
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            heapq.heappush(ready, (0, order_of[child], child, 1))
+                else:
+                    # Stop scheduling new work, let in-flight steps finish
+                    failed = True
+                    ready = []
+                    abandoned.clear()
+
+        return records
+
+    def shutdown(self, wait=True):
+        """Shut down the worker pools"""
+        if self._thread_pool:
+            self._thread_pool.shutdown(wait=wait, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool:
+            self._process_pool.shutdown(wait=wait, cancel_futures=True)
+            self._process_pool = None
+
+    def _build_graph(self, steps):
+        """Normalize steps and validate the dependency graph"""
+        graph = {}
+        previous = None
+        for index, step in enumerate(steps):
+            described = not isinstance(step, dict)
+            if described:
+                step = {"action": step}
+            name = step.get("name") or f"step_{index + 1}"
+            if name in graph:
+                raise ValueError(f"Duplicate step name: {name}")
+            if "depends_on" in step:
+                depends_on = list(step["depends_on"] or [])
+            else:
+                depends_on = [previous] if previous else []
+            graph[name] = {
+                "name": name,
+                "action": step.get("action"),
+                "describes": described,
+                "depends_on": depends_on,
+                "executor": step.get("executor", "thread"),
+                "timeout": step.get("timeout"),
+                "retries": step.get("retries", 0),
+                "backoff": step.get("backoff", 0.5)
+            }
+            previous = name
+
+        for name, step in graph.items():
+            for dep in step["depends_on"]:
+                if dep not in graph:
+                    raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+        self._check_cycles(graph)
+        return graph
+
+    def _check_cycles(self, graph):
+        """Raise if the dependency graph contains a cycle"""
+        state = {}
+        for root in graph:
+            stack = [(root, iter(graph[root]["depends_on"]))]
+            state[root] = "visiting"
+            while stack:
+                node, deps = stack[-1]
+                dep = next(deps, None)
+                if dep is None:
+                    state[node] = "done"
+                    stack.pop()
+                elif state.get(dep) == "visiting":
+                    raise ValueError(f"Dependency cycle detected at step '{dep}'")
+                elif dep not in state:
+                    state[dep] = "visiting"
+                    stack.append((dep, iter(graph[dep]["depends_on"])))
+
+    def _submit(self, step, params, inputs):
+        """Submit a single step attempt to the matching pool"""
+        try:
+            action = self._resolve(step)
+        except Exception as e:
+            # Fail the attempt like any other step error, so it is retried and recorded
+            future = Future()
+            future.set_exception(e)
+            return future
+        if step["executor"] == "process":
+            if not self._process_pool:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes)
+            return self._process_pool.submit(run_step_action, action, params, inputs)
+        if not self._thread_pool:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                   thread_name_prefix="workflow")
+        return self._thread_pool.submit(run_step_action, action, params, inputs)
+
+    def _resolve(self, step):
+        """Get the callable for a step's action (None for a no-op)"""
+        action = step["action"]
+        if action is None or callable(action):
+            return action
+        try:
+            if not self.action_resolver:
+                raise TypeError(f"Step action {action!r} is not callable")
+            return self.action_resolver(action)
+        except Exception as e:
+            if not step["describes"]:
+                raise
+            self.logger.debug(f"Step '{step['name']}' has no action ({e}), treating it as a no-op")
+            return None
+
+    def _next_wakeup(self, running, ready, failed):
+        """Seconds until the next timeout or delayed retry is due"""
+        instants = [info[3] for info in running.values() if info[3] is not None]
+        if ready and not failed:
+            instants.append(ready[0][0])
+        if not instants:
+            return None
+        return max(0, min(instants) - time.monotonic())
@@ -0,0 +1,201 @@
+"""
+Workflow store module
+Persists workflows, scheduled tasks, run checkpoints and stats to local files
+"""
+import os
+import json
+import importlib
+import threading
+from datetime import datetime
+from src.utils.logger import get_logger
+
+
+def action_ref(func):
+    """Return a "module:qualname" reference for an importable callable"""
+    module = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if not module or not qualname or "<" in qualname or module == "__main__":
+        return None
+    return f"{module}:{qualname}"
+
+
+def resolve_action_ref(ref):
+    """Import the callable behind a "module:qualname" reference"""
+    module_name, _, qualname = ref.partition(":")
+    target = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def _encode(value):
+    """JSON fallback for values the json module can't serialize"""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if callable(value) and action_ref(value):
+        return {"__action__": action_ref(value)}
+    return str(value)
+
+
+def _encode_strict(value):
+    """JSON fallback that rejects anything _decode couldn't restore"""
+    if isinstance(value, (datetime, set, frozenset)):
+        return _encode(value)
+    if callable(value) and not isinstance(value, type):
+        if action_ref(value) is None:
+            raise TypeError(f"Callable {value!r} is not importable")
+        return _encode(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    """JSON object hook reversing _encode"""
+    if "__datetime__" in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__action__" in obj and len(obj) == 1:
+        return obj["__action__"]
+    return obj
+
+
+class WorkflowStore:
+    """Workflow Store for durable automation state
+
+    Layout under ``data_dir``::
+
+        workflows.json        workflow definitions
+        scheduled_tasks.json  scheduled tasks
+        stats.json            per-workflow run statistics
+        runs/<run_id>.json    checkpoint of an unfinished run
+
+    Callable step actions and trigger predicates are stored as
+    "module:qualname" references and come back as strings, which the
+    executor resolves on use. Workflows using lambdas or nested functions
+    can't be referenced and are kept in memory only. Scheduled tasks and
+    run checkpoints are written strictly too, so nothing comes back as a
+    string: saving a scheduled task that can't be stored raises TypeError,
+    a run whose params can't be stored is not checkpointed, and a step
+    result that can't be stored is left out, so the step runs again on
+    resume.
+    """
+    def __init__(self, data_dir="data/automation"):
+        self.logger = get_logger()
+        self.data_dir = data_dir
+        self.runs_dir = os.path.join(data_dir, "runs")
+        self._lock = threading.Lock()
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    def load_workflows(self):
+        """Load persisted workflow definitions"""
+        return self._read("workflows.json", {})
+
+    def save_workflows(self, workflows):
+        """Save the workflow definitions that can be persisted"""
+        persistable = {}
+        for name, workflow in workflows.items():
+            try:
+                json.dumps(workflow, default=_encode_strict)
+                persistable[name] = workflow
+            except (TypeError, ValueError) as e:
+                self.logger.warning(f"Workflow '{name}' kept in memory only: {e}")
+        self._write("workflows.json", persistable)
+
+    def load_scheduled_tasks(self):
+        """Load persisted scheduled tasks"""
+        return self._read("scheduled_tasks.json", {})
+
+    def save_scheduled_tasks(self, scheduled_tasks):
+        """Save scheduled tasks; raises TypeError if one can't be stored as is"""
+        json.dumps(scheduled_tasks, default=_encode_strict)
+        self._write("scheduled_tasks.json", scheduled_tasks, strict=True)
+
+    def load_stats(self):
+        """Load per-workflow run statistics"""
+        return self._read("stats.json", {})
+
+    def save_stats(self, stats):
+        """Save per-workflow run statistics"""
+        self._write("stats.json", stats)
+
+    def start_run(self, run_id, workflow_name, params=None):
+        """Record the start of a workflow run"""
+        run = {
+            "run_id": run_id,
+            "workflow": workflow_name,
+            "params": params,
+            "completed": {},
+            "status": "running",
+            "started_at": datetime.now()
+        }
+        try:
+            json.dumps(params, default=_encode_strict)
+        except (TypeError, ValueError) as e:
+            self.logger.warning(f"Run {run_id} of {workflow_name} won't be checkpointed: {e}")
+            run["checkpointed"] = False
+            return run
+        self._write_run(run)
+        return run
+
+    def checkpoint(self, run, step_name, record):
+        """Record a finished step of a run"""
+        if run.get("checkpointed") is False:
+            return
+        if record["success"]:
+            try:
+                json.dumps(record.get("result"), default=_encode_strict)
+                run["completed"][step_name] = record.get("result")
+            except (TypeError, ValueError) as e:
+                self.logger.warning(f"Result of step '{step_name}' not checkpointed, it reruns on resume: {e}")
+        run["updated_at"] = datetime.now()
+        self._write_run(run)
+
+    def finish_run(self, run_id):
+        """Remove the checkpoint of a finished run"""
+        try:
+            os.remove(self._run_path(run_id))
+        except FileNotFoundError:
+            pass
+
+    def pending_runs(self):
+        """Return the checkpoints of runs that never finished"""
+        runs = []
+        for filename in sorted(os.listdir(self.runs_dir)):
+            if not filename.endswith(".json"):
+                continue
+            run = self._read(os.path.join("runs", filename), None)
+            if run and run.get("status") == "running":
+                runs.append(run)
+        return sorted(runs, key=lambda r: r["started_at"])
+
+    def _run_path(self, run_id):
+        """Get the checkpoint path for a run"""
+        return os.path.join(self.runs_dir, f"{run_id}.json")
+
+    def _write_run(self, run):
+        """Write a run checkpoint"""
+        self._write(os.path.join("runs", f"{run['run_id']}.json"), run, strict=True)
+
+    def _read(self, relative_path, default):
+        """Read a JSON file from the store"""
+        path = os.path.join(self.data_dir, relative_path)
+        try:
+            if not os.path.exists(path):
+                return default
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f, object_hook=_decode)
+        except Exception as e:
+            self.logger.error(f"Error reading {path}: {e}")
+            return default
+
+    def _write(self, relative_path, data, strict=False):
+        """Atomically write a JSON file to the store"""
+        path = os.path.join(self.data_dir, relative_path)
+        tmp_path = f"{path}.tmp"
+        try:
+            with self._lock:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, default=_encode_strict if strict else _encode)
+                os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.error(f"Error writing {path}: {e}")
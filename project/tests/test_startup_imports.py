@@ -0,0 +1,49 @@
+"""
+Startup import tests
+Heavy dependencies must only load on first use, not when the CLI starts
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _deferred_modules():
+    """DEFERRED_MODULES from the startup benchmark, so both check the same list"""
+    path = os.path.join(PROJECT_DIR, "benchmarks", "bench_startup.py")
+    spec = importlib.util.spec_from_file_location("bench_startup", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.DEFERRED_MODULES
+
+
+def _imported_at_startup(code, cwd):
+    """Run code in a fresh interpreter and return the deferred modules it imported"""
+    deferred = _deferred_modules()
+    script = (
+        f"import sys\n{code}\n"
+        f"print(' '.join(name for name in {deferred!r} if name in sys.modules))"
+    )
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_import_main_defers_heavy_modules(tmp_path):
+    assert _imported_at_startup("import main", tmp_path) == []
+
+
+def test_cli_startup_defers_heavy_modules(tmp_path):
+    code = (
+        "import contextlib, io\n"
+        "from src.task_manager import TaskManager\n"
+        "from src.ui.cli import CommandLineInterface\n"
+        "cli = CommandLineInterface(TaskManager())\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    cli.get_handler('help')([])"
+    )
+    assert _imported_at_startup(code, tmp_path) == []